@@ -0,0 +1,151 @@
+"""Compare tail latency under overload with and without admission control.
+
+Usage (from the repository root):
+
+    python benchmarks/bench_admission.py
+    python benchmarks/bench_admission.py --concurrency 400 --max-in-flight 4
+
+The benchmark serves the weather server with one `common.serve_http` worker,
+first without admission control and then with `--max-in-flight`. The server
+calls a local stand-in for Open-Meteo that takes `--upstream-latency`
+seconds per request, so the tool is I/O-bound like the real one. Each run
+sends `tools/call` requests from many more concurrent clients than the
+worker can serve. Rejected clients wait for the server's Retry-After hint
+before trying again.
+
+For each run it reports served requests per second, p50/p99 latency of the
+served requests, rejections, and the server's admission metrics. Without
+admission control every request queues and latency grows with the number of
+clients; with it, p99 stays close to the service time and the excess load
+is turned away quickly.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from http.server import ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_http_workers import HEADERS, ROOT, wait_for_port
+from bench_resilience import FAULTS, FaultInjectingHandler
+
+
+async def generate_load(url: str, payload: Dict[str, Any], concurrency: int, duration: float) -> Dict[str, Any]:
+    """Send requests from `concurrency` clients for `duration` seconds."""
+    latencies: List[float] = []
+    rejections = 0
+    rejection_latencies: List[float] = []
+    errors = 0
+    deadline = time.monotonic() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(limits=limits, timeout=60.0) as client:
+        async def worker(n: int):
+            nonlocal rejections, errors
+            headers = {**HEADERS, "x-client-id": f"client-{n}"}
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                try:
+                    response = await client.post(url, json=payload, headers=headers)
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                elapsed = time.perf_counter() - start
+                if response.status_code in (429, 503):
+                    rejections += 1
+                    rejection_latencies.append(elapsed)
+                    await asyncio.sleep(float(response.headers.get("retry-after", 1)))
+                elif response.status_code == 200 and "error" not in response.json():
+                    latencies.append(elapsed)
+                else:
+                    errors += 1
+
+        await asyncio.gather(*(worker(n) for n in range(concurrency)))
+
+    return {"latencies": latencies, "rejections": rejections, "rejection_latencies": rejection_latencies, "errors": errors}
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))]
+
+
+def run(server: str, port: int, payload: Dict[str, Any], concurrency: int, duration: float,
+        admission_args: Optional[List[str]], env: Dict[str, str]) -> None:
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "common.serve_http", server, "--workers", "1",
+         "--host", "127.0.0.1", "--port", str(port), *(admission_args or [])],
+        cwd=ROOT,
+        env=env,
+    )
+    try:
+        wait_for_port(port)
+        url = f"http://127.0.0.1:{port}/mcp"
+        asyncio.run(generate_load(url, payload, 4, 1.0))
+
+        result = asyncio.run(generate_load(url, payload, concurrency, duration))
+        metrics = httpx.get(f"http://127.0.0.1:{port}/admission/metrics").json() if admission_args else None
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    served = result["latencies"]
+    label = "admission" if admission_args else "none"
+    reject_p99 = percentile(result["rejection_latencies"], 0.99) * 1000
+    print(f"{label:<10} {len(served) / duration:>8.0f} {statistics.median(served) * 1000 if served else 0:>8.0f} "
+          f"{percentile(served, 0.99) * 1000:>8.0f} {result['rejections']:>8} {reject_p99:>12.0f} {result['errors']:>7}")
+    if metrics:
+        print(f"           server metrics: {json.dumps(metrics)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark latency under overload with and without admission control.")
+    parser.add_argument("--server", default="exercises/exercise-0/solution/server.py")
+    parser.add_argument("--tool", default="get_weather")
+    parser.add_argument("--args", default='{"latitude": 40.71, "longitude": -74.01}', help="Tool arguments as JSON")
+    parser.add_argument("--upstream-latency", type=float, default=0.2, help="Seconds the Open-Meteo stand-in takes per request")
+    parser.add_argument("--concurrency", type=int, default=48, help="Concurrent clients")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per run")
+    parser.add_argument("--max-in-flight", type=int, default=8)
+    parser.add_argument("--max-queue", type=int, default=16)
+    parser.add_argument("--queue-timeout", type=float, default=0.25)
+    parser.add_argument("--port", type=int, default=8098)
+    args = parser.parse_args()
+
+    payload = {
+        "jsonrpc": "2.0",
+        "id": 1,
+        "method": "tools/call",
+        "params": {"name": args.tool, "arguments": json.loads(args.args)},
+    }
+    admission_args = [
+        "--max-in-flight", str(args.max_in_flight),
+        "--max-queue", str(args.max_queue),
+        "--queue-timeout", str(args.queue_timeout),
+    ]
+
+    FAULTS["latency"] = args.upstream_latency
+    stub = ThreadingHTTPServer(("127.0.0.1", 0), FaultInjectingHandler)
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+    env = {**os.environ, "OPEN_METEO_URL": f"http://127.0.0.1:{stub.server_port}/v1/forecast"}
+
+    print(f"Benchmarking {args.server} tool {args.tool!r} with {args.concurrency} concurrent clients, {args.duration:.0f}s per run")
+    print(f"{'admission':<10} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'rejected':>8} {'reject p99ms':>12} {'errors':>7}")
+    run(args.server, args.port, payload, args.concurrency, args.duration, None, env)
+    run(args.server, args.port, payload, args.concurrency, args.duration, admission_args, env)
+    stub.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Measure cold start of every stdio server in the workshop.
+
+Usage (from the repository root):
+
+    python benchmarks/bench_cold_start.py
+    python benchmarks/bench_cold_start.py --warm-pool --runs 20
+
+For each server the benchmark reports:
+
+* import time of the server script, from `python -X importtime`, with the
+  most expensive top-level imports
+* time from spawning the server to receiving its `initialize` response, the
+  way the workshop clients start it (median of several runs)
+* with --warm-pool, the same time when attaching to a pre-forked warm pool
+  (see common/warm_pool.py)
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List, Tuple
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVERS = [
+    "module-0/my_server.py",
+    "module-1/server.py",
+    "exercises/exercise-0/solution/server.py",
+    "exercises/exercise-1/solution/travel_server.py",
+]
+
+
+def import_profile(script: str, top: int) -> Tuple[float, List[Tuple[str, float]]]:
+    """Import a server script under `-X importtime`.
+
+    Returns:
+        Tuple of (total import seconds, [(module, cumulative seconds)] for the
+        most expensive top-level imports).
+    """
+    code = (
+        "import importlib.util, sys;"
+        f"sys.path.insert(0, {os.path.dirname(script)!r});"
+        f"spec = importlib.util.spec_from_file_location('server', {script!r});"
+        "spec.loader.exec_module(importlib.util.module_from_spec(spec))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=os.path.dirname(script), capture_output=True, text=True,
+    )
+
+    # Lines look like "import time:  self [us] | cumulative | imported package"
+    top_level = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not name.startswith("  "):
+            top_level.append((name.strip(), int(cumulative) / 1e6))
+
+    total = sum(seconds for _, seconds in top_level)
+    return total, sorted(top_level, key=lambda item: item[1], reverse=True)[:top]
+
+
+async def time_to_initialize(params: StdioServerParameters, cwd: str) -> float:
+    """Spawn a server and return seconds until its initialize response."""
+    params.cwd = cwd
+    start = time.perf_counter()
+    async with stdio_client(params, errlog=open(os.devnull, "w")) as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            return time.perf_counter() - start
+
+
+def median_initialize(params: StdioServerParameters, cwd: str, runs: int) -> float:
+    """Median time to initialize over `runs` fresh connections."""
+    return statistics.median(asyncio.run(time_to_initialize(params, cwd)) for _ in range(runs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark stdio server cold start.")
+    parser.add_argument("--runs", type=int, default=10, help="Connections per measurement")
+    parser.add_argument("--top", type=int, default=5, help="Top-level imports to show per server")
+    parser.add_argument("--warm-pool", action="store_true", help="Also measure attaching to a warm pool")
+    args = parser.parse_args()
+
+    rows = []
+    for server in SERVERS:
+        script = os.path.join(ROOT, server)
+        cwd = os.path.dirname(script)
+
+        import_total, heaviest = import_profile(script, args.top)
+        print(f"\n{server}: imports {import_total * 1000:.0f} ms")
+        for name, seconds in heaviest:
+            print(f"    {seconds * 1000:8.1f} ms  {name}")
+
+        cold = median_initialize(StdioServerParameters(command=sys.executable, args=[script]), cwd, args.runs)
+        warm = None
+        if args.warm_pool:
+            socket_path = os.path.join(tempfile.mkdtemp(), "pool.sock")
+            pool = subprocess.Popen(
+                [sys.executable, "-m", "common.warm_pool", "serve", script, "--socket", socket_path],
+                cwd=ROOT, stderr=subprocess.DEVNULL,
+            )
+            try:
+                while not os.path.exists(socket_path):
+                    time.sleep(0.05)
+                attach = StdioServerParameters(
+                    command=sys.executable,
+                    args=[os.path.join(ROOT, "common", "warm_pool.py"), "attach", socket_path],
+                )
+                warm = median_initialize(attach, cwd, args.runs)
+            finally:
+                pool.terminate()
+                pool.wait()
+        rows.append((server, import_total, cold, warm))
+
+    print(f"\n{'server':<48} {'imports':>9} {'cold init':>10} {'warm init':>10} {'speedup':>8}")
+    for server, import_total, cold, warm in rows:
+        warm_text = f"{warm * 1000:8.0f}ms" if warm is not None else f"{'-':>10}"
+        speedup = f"{cold / warm:7.1f}x" if warm else f"{'-':>8}"
+        print(f"{server:<48} {import_total * 1000:7.0f}ms {cold * 1000:8.0f}ms {warm_text} {speedup}")
+
+
+if __name__ == "__main__":
+    main()
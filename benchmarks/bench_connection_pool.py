@@ -0,0 +1,98 @@
+"""Compare one shared MCP session against MCPConnectionPool under concurrency.
+
+Usage (from the repository root):
+
+    python benchmarks/bench_connection_pool.py
+    python benchmarks/bench_connection_pool.py --tasks 64 --calls 50 --pool-sizes 2 4 8
+
+Many tasks call a tool concurrently, first through a single session (the
+old module-level `session` in client-simple.py) and then through pools of
+several sizes. The benchmark reports throughput and latency percentiles.
+FastMCP runs sync tools on the server's event loop, so one server process
+handles one call at a time; the pool spreads calls over several processes.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Any, Awaitable, Callable, Dict, List
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from common.connection_pool import MCPConnectionPool
+
+
+async def drive(call: Callable[[], Awaitable[Any]], tasks: int, calls: int) -> Dict[str, float]:
+    """Run `tasks` concurrent tasks that each await `call` `calls` times."""
+    latencies: List[float] = []
+
+    async def worker():
+        for _ in range(calls):
+            start = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(tasks)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "throughput": len(latencies) / elapsed,
+        "p50": statistics.median(latencies),
+        "p99": latencies[int(len(latencies) * 0.99) - 1],
+    }
+
+
+async def bench_single(params: StdioServerParameters, tool: str, arguments: Dict[str, Any], tasks: int, calls: int) -> Dict[str, float]:
+    """Benchmark one session shared by every task."""
+    async with stdio_client(params) as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            return await drive(lambda: session.call_tool(tool, arguments), tasks, calls)
+
+
+async def bench_pool(params: StdioServerParameters, size: int, tool: str, arguments: Dict[str, Any], tasks: int, calls: int) -> Dict[str, float]:
+    """Benchmark a connection pool of `size` sessions."""
+    pool = MCPConnectionPool({"server": params}, size=size)
+    await pool.start()
+    try:
+        return await drive(lambda: pool.call_tool(tool, arguments), tasks, calls)
+    finally:
+        await pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark MCPConnectionPool against a single session.")
+    parser.add_argument("--server", default="module-1/server.py")
+    parser.add_argument("--tool", default="get_knowledge_base")
+    parser.add_argument("--args", default="{}", help="Tool arguments as JSON")
+    parser.add_argument("--tasks", type=int, default=32, help="Concurrent tasks")
+    parser.add_argument("--calls", type=int, default=25, help="Calls per task")
+    parser.add_argument("--pool-sizes", type=int, nargs="+", default=[2, 4, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    script = os.path.join(ROOT, args.server)
+    params = StdioServerParameters(command=sys.executable, args=[script], cwd=os.path.dirname(script))
+    arguments = json.loads(args.args)
+
+    print(f"{args.tasks} tasks x {args.calls} calls of {args.tool!r} on {args.server}")
+    print(f"{'mode':<16} {'calls/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+
+    rows = [("single session", asyncio.run(bench_single(params, args.tool, arguments, args.tasks, args.calls)))]
+    for size in sorted(set(args.pool_sizes)):
+        rows.append((f"pool of {size}", asyncio.run(bench_pool(params, size, args.tool, arguments, args.tasks, args.calls))))
+
+    for mode, result in rows:
+        print(f"{mode:<16} {result['throughput']:>9.0f} {result['p50'] * 1000:>8.1f} {result['p99'] * 1000:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
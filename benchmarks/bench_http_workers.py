@@ -0,0 +1,138 @@
+"""Measure streamable HTTP throughput as the number of server workers grows.
+
+Usage (from the repository root):
+
+    python benchmarks/bench_http_workers.py
+    python benchmarks/bench_http_workers.py --server module-1/server.py --tool get_knowledge_base --args '{}'
+
+For each worker count the benchmark starts `common.serve_http`, drives it
+with several load-generator processes sending `tools/call` requests for a
+fixed duration, and reports requests per second and speedup over one worker.
+Load generators run in their own processes so the client side does not
+become the bottleneck.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import Any, Dict, Tuple
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEADERS = {"Accept": "application/json, text/event-stream", "Content-Type": "application/json"}
+
+
+def wait_for_port(port: int, timeout: float = 30.0) -> None:
+    """Block until something accepts connections on localhost:port."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise TimeoutError(f"Server did not start listening on port {port}")
+
+
+async def generate_load(url: str, payload: Dict[str, Any], concurrency: int, duration: float) -> Tuple[int, int]:
+    """Send requests from `concurrency` tasks until `duration` elapses.
+
+    Returns:
+        Tuple of (successful requests, failed requests).
+    """
+    ok = 0
+    failed = 0
+    deadline = time.monotonic() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(limits=limits, timeout=30.0) as client:
+        async def worker():
+            nonlocal ok, failed
+            while time.monotonic() < deadline:
+                try:
+                    response = await client.post(url, json=payload, headers=HEADERS)
+                    if response.status_code == 200 and "error" not in response.json():
+                        ok += 1
+                    else:
+                        failed += 1
+                except httpx.HTTPError:
+                    failed += 1
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return ok, failed
+
+
+def load_process(args: Tuple[str, Dict[str, Any], int, float]) -> Tuple[int, int]:
+    """Entry point for one load-generator process."""
+    return asyncio.run(generate_load(*args))
+
+
+def run_level(server: str, port: int, workers: int, payload: Dict[str, Any], clients: int, concurrency: int, duration: float) -> Tuple[float, int]:
+    """Benchmark one worker count.
+
+    Returns:
+        Tuple of (requests per second, failed requests).
+    """
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "common.serve_http", server, "--workers", str(workers), "--host", "127.0.0.1", "--port", str(port)],
+        cwd=ROOT,
+    )
+    try:
+        wait_for_port(port)
+        url = f"http://127.0.0.1:{port}/mcp"
+        # Warm up every worker before measuring
+        asyncio.run(generate_load(url, payload, workers * 2, 1.0))
+
+        with multiprocessing.Pool(clients) as pool:
+            results = pool.map(load_process, [(url, payload, concurrency, duration)] * clients)
+        ok = sum(r[0] for r in results)
+        failed = sum(r[1] for r in results)
+        return ok / duration, failed
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    default_levels = sorted({1, 2, 4, 8, 16, cpus} & set(range(1, cpus + 1)))
+
+    parser = argparse.ArgumentParser(description="Benchmark multi-worker streamable HTTP throughput.")
+    parser.add_argument("--server", default="exercises/exercise-1/solution/travel_server.py")
+    parser.add_argument("--tool", default="recommend_trip")
+    parser.add_argument("--args", default='{"destination": "Paris", "budget": 1500, "duration_days": 5}', help="Tool arguments as JSON")
+    parser.add_argument("--workers", type=int, nargs="+", default=default_levels, help="Worker counts to measure")
+    parser.add_argument("--clients", type=int, default=max(2, cpus // 2), help="Load-generator processes")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent requests per load-generator process")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to measure each worker count")
+    parser.add_argument("--port", type=int, default=8099)
+    args = parser.parse_args()
+
+    payload = {
+        "jsonrpc": "2.0",
+        "id": 1,
+        "method": "tools/call",
+        "params": {"name": args.tool, "arguments": json.loads(args.args)},
+    }
+
+    print(f"Benchmarking {args.server} tool {args.tool!r} on {cpus} CPUs "
+          f"({args.clients} load processes x {args.concurrency} concurrent requests, {args.duration:.0f}s per level)")
+    print(f"{'workers':>8} {'req/s':>10} {'speedup':>8} {'efficiency':>10} {'errors':>7}")
+
+    baseline = None
+    for workers in args.workers:
+        rps, failed = run_level(args.server, args.port, workers, payload, args.clients, args.concurrency, args.duration)
+        baseline = baseline or rps
+        speedup = rps / baseline
+        print(f"{workers:>8} {rps:>10.0f} {speedup:>7.2f}x {speedup / workers:>9.0%} {failed:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Measure semantic search latency over a large knowledge base.
+
+Usage (from the repository root):
+
+    python benchmarks/bench_kb_search.py
+    python benchmarks/bench_kb_search.py --entries 20000 --top-k 10
+
+Builds a `KBIndex` over `--entries` synthetic Q&A pairs in a temporary
+directory, then reports:
+
+- the time to embed everything from scratch
+- the time to re-open the saved index (memory-mapped, nothing re-embedded)
+- the time to sync after 1% of the entries changed (incremental rebuild)
+- single-query and batched search latency percentiles
+- the latency of single-entry upserts and removes, as made by the KB edit tools
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "module-1")]
+from kb_index import KBIndex, entry_text
+
+TOPICS = ["vacation", "remote work", "expense", "parental leave", "laptop", "security training", "travel",
+          "health insurance", "overtime", "holiday", "sick leave", "onboarding", "retirement", "bonus", "relocation"]
+QUESTIONS = ["What is the policy on {topic}?", "How do I request {topic}?", "Who approves {topic}?",
+             "Is there a limit on {topic}?", "When does {topic} apply for team {n}?"]
+ANSWERS = ["Employees in office {n} should submit {topic} requests through the HR portal.",
+           "{topic} is approved by your manager within {n} business days.",
+           "The {topic} allowance for region {n} is reviewed every year."]
+
+
+def synthetic_kb(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    entries = []
+    for i in range(count):
+        topic = rng.choice(TOPICS)
+        n = rng.randrange(1000)
+        entries.append((f"kb-{i + 1}", entry_text(rng.choice(QUESTIONS).format(topic=topic, n=n),
+                                                  rng.choice(ANSWERS).format(topic=topic, n=n) + f" Ref {i}.")))
+    return entries
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark KB semantic search.")
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=32)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--edits", type=int, default=200, help="Single-entry edits to time")
+    args = parser.parse_args()
+
+    texts = synthetic_kb(args.entries)
+    queries = [f"can I take {random.choice(TOPICS)} days" for _ in range(args.queries)]
+
+    with tempfile.TemporaryDirectory() as index_dir:
+        index = KBIndex(index_dir)
+        embedded, build = timed(lambda: index.sync(texts))
+        print(f"{args.entries:,} entries, {index.stats()['dimensions']} dimensions ({index.stats()['embedder']})")
+        print(f"full build:        {build:8.2f}s ({embedded:,} embedded)")
+
+        reopened, reopen = timed(lambda: KBIndex(index_dir))
+        embedded, _ = timed(lambda: reopened.sync(texts))
+        print(f"reopen (mmap):     {reopen:8.3f}s ({embedded:,} embedded on sync)")
+
+        changed = list(texts)
+        for i in random.sample(range(len(changed)), len(changed) // 100):
+            changed[i] = (changed[i][0], changed[i][1] + " Updated.")
+        embedded, incremental = timed(lambda: index.sync(changed))
+        print(f"1% changed:        {incremental:8.2f}s ({embedded:,} embedded)")
+
+        single = [timed(lambda: index.search([query], args.top_k))[1] for query in queries]
+        print(f"single query:      p50 {statistics.median(single) * 1000:6.1f}ms  p99 {percentile(single, 0.99) * 1000:6.1f}ms")
+
+        batches = [queries[i:i + args.batch] for i in range(0, len(queries), args.batch)]
+        batched = [timed(lambda: index.search(batch, args.top_k))[1] for batch in batches]
+        per_query = sum(batched) / len(queries)
+        print(f"batch of {args.batch}:       p50 {statistics.median(batched) * 1000:6.1f}ms  "
+              f"({per_query * 1000:.2f}ms per query)")
+
+        best = index.search(["how many vacation days can I take"], 3)[0]
+        print("sample: 'how many vacation days can I take' ->")
+        text_of = dict(changed)
+        for entry_id, score in best:
+            print(f"  {score:.3f}  {text_of[entry_id].splitlines()[0]}")
+
+        edited = random.sample(changed, args.edits)
+        upserts = [timed(lambda: index.upsert(entry_id, text + " Edited."))[1] for entry_id, text in edited]
+        removes = [timed(lambda: index.remove(entry_id))[1] for entry_id, _ in edited]
+        print(f"upsert one entry:  p50 {statistics.median(upserts) * 1000:6.2f}ms  p99 {percentile(upserts, 0.99) * 1000:6.2f}ms")
+        print(f"remove one entry:  p50 {statistics.median(removes) * 1000:6.3f}ms  p99 {percentile(removes, 0.99) * 1000:6.3f}ms")
+        single = [timed(lambda: index.search([query], args.top_k))[1] for query in queries]
+        print(f"search after {args.edits} edits: p50 {statistics.median(single) * 1000:6.1f}ms  "
+              f"p99 {percentile(single, 0.99) * 1000:6.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Run a scripted travel-assistant session and report prompt-cache usage.
+
+Usage (from the repository root; needs OPENAI_API_KEY in .env):
+
+    python benchmarks/bench_prompt_cache.py
+
+The script drives `travel_client.process_user_query` through a fixed
+conversation against the travel server. Before each turn it hashes the
+request prefix (tool definitions plus system message) to show it stays
+byte-identical. At the end it prints the share of prompt tokens the API
+reported as cached and the latency of requests with and without a cached
+prefix. The LLM response cache is disabled so every turn reaches the API.
+Cached-token counts are only reported for models with automatic prompt
+caching (travel_client.MODEL, gpt-4o).
+The scripted session books a trip, so it writes to the travel server's
+bookings/ directory.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sys
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLIENT_DIR = os.path.join(ROOT, "exercises", "exercise-1", "solution")
+
+os.chdir(CLIENT_DIR)
+sys.path[:0] = [ROOT, CLIENT_DIR]
+import travel_client
+from common.llm_cache import LLMResponseCache
+
+SCRIPT = [
+    "What would you recommend for 5 days in Paris on a $1500 budget?",
+    "And for Tokyo with the same budget?",
+    "How about London for a week with $4000?",
+    "Book the Paris trip for Dana Levi from 2025-09-01 to 2025-09-05 with a $1500 budget.",
+    "Add a flight from Tel Aviv to Paris departing 2025-09-01 08:30 to that booking.",
+    "Summarize everything I've booked so far.",
+]
+
+
+def prefix_hash(tools, system_prompt: str) -> str:
+    """Hash the part of the request that should never change."""
+    prefix = json.dumps({"tools": tools, "system": system_prompt}, separators=(",", ":"))
+    return hashlib.sha256(prefix.encode("utf-8")).hexdigest()[:12]
+
+
+async def main():
+    # Every turn must reach the API for cached-token counts to mean anything
+    travel_client.llm_cache = LLMResponseCache(max_entries=0)
+
+    server_params = StdioServerParameters(command=sys.executable, args=["travel_server.py"])
+    async with stdio_client(server_params) as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            history = [{"role": "system", "content": travel_client.SYSTEM_PROMPT}]
+
+            for turn, user_input in enumerate(SCRIPT, 1):
+                # Re-fetch the tools every turn to show they serialize identically
+                tools = await travel_client.get_mcp_tools(session)
+                print(f"\n=== Turn {turn} (prefix {prefix_hash(tools, travel_client.SYSTEM_PROMPT)}): {user_input}")
+                response, history = await travel_client.process_user_query(user_input, history, session, tools)
+                print(f"Assistant: {response}")
+
+    print("\nPer request:")
+    for i, request in enumerate(travel_client.prompt_cache.requests, 1):
+        print(f"  {i:2d}. prompt {request['prompt_tokens']:6d}  cached {request['cached_tokens']:6d}  {request['latency']:.2f}s")
+    print(travel_client.prompt_cache.report())
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
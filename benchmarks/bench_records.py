@@ -0,0 +1,101 @@
+"""Compare the cost of storing bookings as pretty-printed JSON and as compact orjson.
+
+Usage (from the repository root):
+
+    python benchmarks/bench_records.py
+    python benchmarks/bench_records.py --count 200000
+
+The benchmark generates `--count` trip bookings and then, for each
+format, reports:
+
+- the memory held after loading them from disk (traced with tracemalloc)
+- the on-disk size
+- the time to encode and decode them
+
+Formats compared:
+
+- `json.dumps(..., indent=2)` (the previous booking store format)
+- compact `orjson.dumps` (what BookingStore writes now)
+
+Memory is measured on decoded data rather than on the generated objects,
+because that is what a reader of the booking files holds.
+"""
+
+import argparse
+import gc
+import json
+import random
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+import orjson
+
+DESTINATIONS = ["Paris", "Tokyo", "New York", "London", "Rome", "Barcelona", "Lisbon", "Berlin"]
+STATUSES = ["confirmed", "confirmed", "confirmed", "cancelled"]
+
+
+def generate(count: int) -> List[Dict[str, Any]]:
+    """Generate trip booking dicts shaped like travel_server's records."""
+    rng = random.Random(42)
+    return [
+        {
+            "booking_id": f"TRIP-{i:08X}",
+            "traveler_name": f"Traveler {rng.randrange(100000)}",
+            "destination": rng.choice(DESTINATIONS),
+            "start_date": f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 20):02d}",
+            "end_date": f"2025-{rng.randint(1, 12):02d}-{rng.randint(21, 28):02d}",
+            "budget": rng.randrange(500, 10000),
+            "booking_date": f"2025-01-{rng.randint(1, 28):02d}T12:00:00",
+            "status": rng.choice(STATUSES),
+            "group_id": None,
+        }
+        for i in range(count)
+    ]
+
+
+def held_memory(load: Callable[[], Any]) -> int:
+    """Return the bytes still allocated by `load`'s result."""
+    gc.collect()
+    tracemalloc.start()
+    result = load()
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return held
+
+
+def timed(fn: Callable[[], Any]) -> Tuple[Any, float]:
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark booking storage formats.")
+    parser.add_argument("--count", type=int, default=1_000_000, help="Number of bookings")
+    args = parser.parse_args()
+
+    dicts = generate(args.count)
+
+    formats = [
+        ("json indent=2", lambda: json.dumps(dicts, indent=2).encode(), lambda blob: json.loads(blob)),
+        ("orjson", lambda: orjson.dumps(dicts), lambda blob: orjson.loads(blob)),
+    ]
+
+    print(f"{args.count:,} trip bookings")
+    print(f"{'format':<22} {'memory MB':>10} {'bytes/rec':>10} {'disk MB':>9} {'encode s':>9} {'decode s':>9}")
+    for name, encode, decode in formats:
+        blob, encode_time = timed(encode)
+        loaded, decode_time = timed(lambda: decode(blob))
+        del loaded
+        # Measured separately because tracing slows decoding down
+        held = held_memory(lambda: decode(blob))
+        print(f"{name:<22} {held / 1e6:>10.1f} {held / args.count:>10.0f} {len(blob) / 1e6:>9.1f} "
+              f"{encode_time:>9.2f} {decode_time:>9.2f}")
+        del blob
+        gc.collect()
+
+
+if __name__ == "__main__":
+    main()
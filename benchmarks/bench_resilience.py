@@ -0,0 +1,122 @@
+"""Exercise the weather server's resilience layer against a fault-injecting stub.
+
+Usage (from the repository root):
+
+    python benchmarks/bench_resilience.py
+
+A local HTTP stub stands in for Open-Meteo. The weather server points at it
+through OPEN_METEO_URL and is called in-process through a FastMCP client.
+The stub runs through these phases:
+
+    healthy   normal responses (fills the stale cache)
+    flaky     40% of responses are 503, which retries absorb
+    slow      responses take 3s while the client sends a 1s budget
+    outage    every response is 503, so the breaker opens and stale data is served
+    recovery  the stub is healthy again and the breaker closes after its reset timeout
+
+For each phase the script prints fresh/stale/error counts, latency and the
+breaker state, so you can see calls fail fast instead of piling up.
+"""
+
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FAULTS: Dict[str, Any] = {"error_rate": 0.0, "latency": 0.0}
+
+
+class FaultInjectingHandler(BaseHTTPRequestHandler):
+    """Answers like Open-Meteo's forecast endpoint, with injected faults."""
+
+    def do_GET(self):
+        time.sleep(FAULTS["latency"])
+        if random.random() < FAULTS["error_rate"]:
+            self.send_response(503)
+            self.end_headers()
+            return
+
+        body = json.dumps({
+            "current": {"temperature_2m": 21.5, "relative_humidity_2m": 40, "wind_speed_10m": 8.2,
+                        "weather_code": 1, "time": "2025-01-01T12:00"},
+            "current_units": {"temperature_2m": "°C"},
+        }).encode()
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up waiting, which is what the slow phase tests
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+async def run_phase(client, breaker, name: str, calls: int, budget: Optional[float] = None) -> None:
+    """Call get_weather `calls` times and print a summary row."""
+    fresh = stale = errors = 0
+    latencies = []
+    meta = {"timeout": budget} if budget else None
+
+    for _ in range(calls):
+        start = time.perf_counter()
+        result = await client.call_tool("get_weather", {"latitude": 40.71, "longitude": -74.01}, meta=meta)
+        latencies.append(time.perf_counter() - start)
+        data = result.data
+        if "error" in data:
+            errors += 1
+        elif data.get("stale"):
+            stale += 1
+        else:
+            fresh += 1
+
+    print(f"{name:<10} {fresh:>6} {stale:>6} {errors:>7} {statistics.median(latencies) * 1000:>9.0f} "
+          f"{max(latencies) * 1000:>9.0f}  {breaker.state}")
+
+
+async def main():
+    stub = ThreadingHTTPServer(("127.0.0.1", 0), FaultInjectingHandler)
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+    os.environ["OPEN_METEO_URL"] = f"http://127.0.0.1:{stub.server_port}/v1/forecast"
+
+    sys.path.insert(0, os.path.join(ROOT, "exercises", "exercise-0", "solution"))
+    import server
+    from fastmcp import Client
+
+    # Short reset timeout so the recovery phase doesn't take 30s
+    breaker = server.open_meteo_breaker
+    breaker.reset_timeout = 2.0
+
+    print(f"{'phase':<10} {'fresh':>6} {'stale':>6} {'errors':>7} {'p50 ms':>9} {'max ms':>9}  breaker")
+    async with Client(server.mcp) as client:
+        FAULTS.update(error_rate=0.0, latency=0.0)
+        await run_phase(client, breaker, "healthy", 10)
+
+        FAULTS.update(error_rate=0.4)
+        await run_phase(client, breaker, "flaky", 20)
+
+        FAULTS.update(error_rate=0.0, latency=3.0)
+        await run_phase(client, breaker, "slow", 3, budget=1.0)
+
+        FAULTS.update(error_rate=1.0, latency=0.0)
+        await run_phase(client, breaker, "outage", 20)
+
+        FAULTS.update(error_rate=0.0)
+        await asyncio.sleep(breaker.reset_timeout)
+        await run_phase(client, breaker, "recovery", 10)
+
+    stub.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
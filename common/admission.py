@@ -0,0 +1,252 @@
+"""Admission control for MCP servers served over HTTP.
+
+`AdmissionMiddleware` is an ASGI middleware placed in front of a server's
+streamable HTTP app (see common/serve_http.py). For every JSON-RPC request
+it:
+
+1. Applies token-bucket rate limits per client and per tool to `tools/call`
+   requests. Clients are identified by the `mcp-session-id` header, then
+   `x-client-id`, then their IP address.
+2. Bounds the number of requests being processed at once. Up to
+   `max_queue` requests wait for a slot for at most `queue_timeout`
+   seconds; anything beyond that is rejected immediately.
+
+Rejected requests get HTTP 429 (rate limited) or 503 (overloaded) with a
+`Retry-After` header and a JSON-RPC error, so a burst is turned away quickly
+instead of queueing without bound and slowing down every request.
+`GET /admission/metrics` returns in-flight, queue depth and rejection counters.
+"""
+
+import asyncio
+import json
+import math
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+class TokenBucket:
+    """Allow `rate` requests per second with bursts of up to `burst`."""
+
+    def __init__(self, rate: float, burst: float):
+        if rate <= 0 or burst < 1:
+            raise ValueError(f"Token bucket needs rate > 0 and burst >= 1, got rate={rate}, burst={burst}")
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def try_acquire(self) -> Tuple[bool, float]:
+        """Take one token if available.
+
+        Returns:
+            Tuple of (allowed, seconds until a token is available).
+        """
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True, 0.0
+        return False, (1 - self.tokens) / self.rate
+
+
+class AdmissionController:
+    """Rate limits and concurrency bound shared by all requests of a server.
+
+    Args:
+        max_in_flight: Requests processed concurrently
+        max_queue: Requests allowed to wait for a processing slot
+        queue_timeout: Longest a request may wait for a slot, in seconds
+        client_rate: Per-client `tools/call` requests per second (None disables)
+        client_burst: Per-client burst size
+        tool_rates: Per-tool (rate, burst) limits, shared by all clients
+        max_clients: Client buckets kept before the least recently used are dropped
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 32,
+        max_queue: int = 64,
+        queue_timeout: float = 1.0,
+        client_rate: Optional[float] = None,
+        client_burst: float = 20,
+        tool_rates: Optional[Dict[str, Tuple[float, float]]] = None,
+        max_clients: int = 10000,
+    ):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.client_rate = client_rate
+        self.client_burst = client_burst
+        self.max_clients = max_clients
+        self.tool_buckets = {name: TokenBucket(rate, burst) for name, (rate, burst) in (tool_rates or {}).items()}
+        self.client_buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+        self.in_flight = 0
+        self.queued = 0
+        self._slots: Optional[asyncio.Semaphore] = None
+        # Moving average of request service time, used for Retry-After hints
+        self.avg_service_time = 0.05
+        self.metrics = {"admitted": 0, "rejected_rate_limited": 0, "rejected_overloaded": 0, "rejected_queue_timeout": 0}
+
+    def check_rate(self, client: str, tool: Optional[str]) -> Optional[float]:
+        """Apply the rate limits to one `tools/call` request.
+
+        Returns:
+            None if allowed, otherwise seconds the client should wait.
+        """
+        if self.client_rate is not None:
+            bucket = self.client_buckets.get(client)
+            if bucket is None:
+                bucket = self.client_buckets[client] = TokenBucket(self.client_rate, self.client_burst)
+                if len(self.client_buckets) > self.max_clients:
+                    self.client_buckets.popitem(last=False)
+            self.client_buckets.move_to_end(client)
+            allowed, wait = bucket.try_acquire()
+            if not allowed:
+                return wait
+
+        if tool in self.tool_buckets:
+            allowed, wait = self.tool_buckets[tool].try_acquire()
+            if not allowed:
+                return wait
+        return None
+
+    def overload_retry_after(self) -> float:
+        """Estimate when a processing slot will free up for a new request."""
+        return self.avg_service_time * (self.queued + 1) / self.max_in_flight
+
+    async def acquire(self) -> Optional[str]:
+        """Wait for a processing slot.
+
+        Returns:
+            None once a slot is held, otherwise the metric name of the rejection reason.
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+
+        if self.in_flight >= self.max_in_flight and self.queued >= self.max_queue:
+            return "rejected_overloaded"
+
+        self.queued += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            return "rejected_queue_timeout"
+        finally:
+            self.queued -= 1
+        self.in_flight += 1
+        return None
+
+    def release(self, service_time: float) -> None:
+        self.in_flight -= 1
+        self._slots.release()
+        self.avg_service_time += 0.1 * (service_time - self.avg_service_time)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self.in_flight,
+            "queue_depth": self.queued,
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "avg_service_time": round(self.avg_service_time, 4),
+            **self.metrics,
+        }
+
+
+class AdmissionMiddleware:
+    """ASGI middleware enforcing an AdmissionController in front of an MCP app."""
+
+    def __init__(self, app, controller: AdmissionController, metrics_path: str = "/admission/metrics"):
+        self.app = app
+        self.controller = controller
+        self.metrics_path = metrics_path
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        if scope["path"] == self.metrics_path and scope["method"] == "GET":
+            return await self._respond(send, 200, self.controller.snapshot())
+
+        if scope["method"] != "POST":
+            return await self.app(scope, receive, send)
+
+        # Buffer the body so we can read the JSON-RPC method, then replay it to the app
+        body = b""
+        more = True
+        while more:
+            message = await receive()
+            body += message.get("body", b"")
+            more = message.get("more_body", False)
+
+        request_id, method, tool = None, None, None
+        try:
+            payload = json.loads(body)
+            if isinstance(payload, dict):
+                request_id = payload.get("id")
+                method = payload.get("method")
+                if method == "tools/call":
+                    tool = (payload.get("params") or {}).get("name")
+        except ValueError:
+            pass
+
+        if method == "tools/call":
+            wait = self.controller.check_rate(self._client_key(scope), tool)
+            if wait is not None:
+                self.controller.metrics["rejected_rate_limited"] += 1
+                return await self._reject(send, 429, request_id, "Rate limit exceeded", wait)
+
+        rejection = await self.controller.acquire()
+        if rejection is not None:
+            self.controller.metrics[rejection] += 1
+            return await self._reject(send, 503, request_id, "Server overloaded", self.controller.overload_retry_after())
+
+        self.controller.metrics["admitted"] += 1
+        start = time.monotonic()
+        replayed = False
+
+        async def replay_receive():
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        try:
+            await self.app(scope, replay_receive, send)
+        finally:
+            self.controller.release(time.monotonic() - start)
+
+    @staticmethod
+    def _client_key(scope) -> str:
+        headers = dict(scope.get("headers") or [])
+        for name in (b"mcp-session-id", b"x-client-id"):
+            if name in headers:
+                return headers[name].decode("latin-1")
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    async def _reject(self, send, status: int, request_id: Any, message: str, retry_after: float) -> None:
+        retry_after = max(1, math.ceil(retry_after))
+        await self._respond(
+            send,
+            status,
+            {
+                "jsonrpc": "2.0",
+                "id": request_id,
+                "error": {"code": -32000, "message": f"{message}, retry after {retry_after}s", "data": {"retry_after": retry_after}},
+            },
+            [(b"retry-after", str(retry_after).encode())],
+        )
+
+    @staticmethod
+    async def _respond(send, status: int, data: Dict[str, Any], headers=()) -> None:
+        body = json.dumps(data).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()), *headers],
+        })
+        await send({"type": "http.response.body", "body": body})
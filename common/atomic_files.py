@@ -0,0 +1,58 @@
+"""Atomic file replacement that keeps normal file permissions.
+
+Writing to a temporary file and renaming it over the target means readers
+see either the old document or the new one, never a partial write. But
+`tempfile.mkstemp` creates files as 0600, so each renamed file would become
+readable only by its owner. The helpers here give the temporary file the
+target's current mode, or the mode a plain `open(path, "w")` would give it
+(0666 minus the umask) when the target doesn't exist yet.
+
+    atomic_write(path, orjson.dumps(document))
+
+    # Or write first and swap later, e.g. outside and inside a lock
+    tmp = write_temp(path, data)
+    os.replace(tmp, path)
+"""
+
+import os
+import stat
+import tempfile
+
+# Read once: os.umask can only be read by setting it
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def file_mode(path: str) -> int:
+    """Permission bits for a new version of `path`."""
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        return 0o666 & ~_UMASK
+
+
+def write_temp(path: str, data: bytes, suffix: str = ".tmp") -> str:
+    """Write `data` to a temporary file next to `path`, with `path`'s mode.
+
+    Returns:
+        The temporary file's path; rename it over `path` with `os.replace`.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=suffix)
+    try:
+        os.fchmod(fd, file_mode(path))
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return tmp_path
+
+
+def atomic_write(path: str, data: bytes) -> None:
+    """Replace `path` with `data` in one rename."""
+    tmp_path = write_temp(path, data)
+    try:
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
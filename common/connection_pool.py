@@ -0,0 +1,281 @@
+"""Pool of MCP client sessions that many tasks can use concurrently.
+
+Instead of one global `ClientSession` per process, the pool keeps several
+stdio sessions open to each server, routes every request to the least busy
+healthy session, pings idle sessions in the background, reconnects sessions
+whose server went away, and drains in-flight requests on shutdown.
+
+Example:
+
+    pool = MCPConnectionPool({"kb": StdioServerParameters(command="python", args=["server.py"])}, size=4)
+    await pool.start()
+    result = await pool.call_tool("get_knowledge_base", {})
+    await pool.close()
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import anyio
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+from mcp.shared.exceptions import McpError
+from mcp.types import CONNECTION_CLOSED, CallToolResult, ListToolsResult
+
+# Errors that mean the session itself is unusable, not that a request failed
+CONNECTION_ERRORS = (anyio.ClosedResourceError, anyio.BrokenResourceError, anyio.EndOfStream, ConnectionError)
+
+
+def is_connection_error(error: BaseException) -> bool:
+    """Return True if `error` means the underlying session is broken."""
+    if isinstance(error, McpError):
+        return error.error.code == CONNECTION_CLOSED
+    return isinstance(error, CONNECTION_ERRORS)
+
+
+class PooledConnection:
+    """A single MCP session owned by its own task.
+
+    The stdio transport and ClientSession contexts must be exited by the task
+    that entered them, so each connection runs in a dedicated task that opens
+    the session, waits until it is asked to close, and then closes it.
+    """
+
+    def __init__(self, server_name: str, params: StdioServerParameters):
+        self.server_name = server_name
+        self.params = params
+        self.session: Optional[ClientSession] = None
+        self.in_flight = 0
+        self.healthy = False
+        self._task: Optional[asyncio.Task] = None
+        self._ready = asyncio.Event()
+        self._stop = asyncio.Event()
+        self._error: Optional[BaseException] = None
+
+    async def open(self) -> None:
+        """Start the server and complete the MCP handshake."""
+        self._ready = asyncio.Event()
+        self._stop = asyncio.Event()
+        self._error = None
+        self._task = asyncio.create_task(self._run())
+        await self._ready.wait()
+        if self._error is not None:
+            raise self._error
+
+    async def close(self) -> None:
+        """Close the session and stop the server process."""
+        self._stop.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+    async def _run(self) -> None:
+        try:
+            async with stdio_client(self.params) as (read, write):
+                async with ClientSession(read, write) as session:
+                    await session.initialize()
+                    self.session = session
+                    self.healthy = True
+                    self._ready.set()
+                    await self._stop.wait()
+        except Exception as e:
+            self._error = e
+        finally:
+            self.healthy = False
+            self.session = None
+            self._ready.set()
+
+
+class MCPConnectionPool:
+    """Manage several sessions to one or more MCP servers.
+
+    Args:
+        servers: Mapping of server name to the parameters used to spawn it
+        size: Number of sessions kept open per server
+        health_check_interval: Seconds between background pings of idle sessions
+        ping_timeout: Seconds to wait for a ping before reconnecting the session
+    """
+
+    def __init__(
+        self,
+        servers: Dict[str, StdioServerParameters],
+        size: int = 4,
+        health_check_interval: float = 30.0,
+        ping_timeout: float = 5.0,
+    ):
+        self.servers = servers
+        self.size = size
+        self.health_check_interval = health_check_interval
+        self.ping_timeout = ping_timeout
+        self.connections: List[PooledConnection] = []
+        self._reconnecting: Dict[PooledConnection, asyncio.Task] = {}
+        self._health_task: Optional[asyncio.Task] = None
+        self._in_flight = 0
+        self._drained = asyncio.Condition()
+        self._closing = False
+
+    async def start(self) -> None:
+        """Open every session concurrently and start health checks.
+
+        Raises:
+            RuntimeError: If no session to some server could be opened.
+        """
+        self.connections = [
+            PooledConnection(name, params)
+            for name, params in self.servers.items()
+            for _ in range(self.size)
+        ]
+        results = await asyncio.gather(*(conn.open() for conn in self.connections), return_exceptions=True)
+
+        for name in self.servers:
+            if not any(conn.healthy for conn in self.connections if conn.server_name == name):
+                errors = [r for r, conn in zip(results, self.connections) if conn.server_name == name]
+                # Don't leave the other servers' processes running
+                await asyncio.gather(*(conn.close() for conn in self.connections))
+                raise RuntimeError(f"Could not connect to MCP server '{name}': {errors[0]}")
+
+        # Sessions that failed to open are retried in the background
+        for conn in self.connections:
+            if not conn.healthy:
+                self._schedule_reconnect(conn)
+
+        self._health_task = asyncio.create_task(self._health_loop())
+
+    def _resolve_server(self, server: Optional[str]) -> str:
+        if server is not None:
+            if server not in self.servers:
+                raise ValueError(f"Unknown MCP server '{server}'")
+            return server
+        if len(self.servers) != 1:
+            raise ValueError("server must be given when the pool has more than one server")
+        return next(iter(self.servers))
+
+    def _pick(self, server: str) -> PooledConnection:
+        """Return the healthy session to `server` with the fewest requests in flight."""
+        candidates = [conn for conn in self.connections if conn.server_name == server and conn.healthy]
+        if not candidates:
+            raise RuntimeError(f"No healthy connection to MCP server '{server}'")
+        return min(candidates, key=lambda conn: conn.in_flight)
+
+    @asynccontextmanager
+    async def session(self, server: Optional[str] = None) -> AsyncIterator[ClientSession]:
+        """Borrow the least busy session to a server for the duration of the block.
+
+        Args:
+            server: Server name; may be omitted when the pool has a single server
+
+        Yields:
+            An initialized ClientSession. Sessions are shared, so callers must
+            not close it.
+        """
+        if self._closing:
+            raise RuntimeError("Connection pool is shutting down")
+
+        conn = self._pick(self._resolve_server(server))
+        conn.in_flight += 1
+        self._in_flight += 1
+        try:
+            yield conn.session
+        except BaseException as e:
+            if is_connection_error(e):
+                self._schedule_reconnect(conn)
+            raise
+        finally:
+            conn.in_flight -= 1
+            self._in_flight -= 1
+            if self._in_flight == 0:
+                async with self._drained:
+                    self._drained.notify_all()
+
+    async def call_tool(self, name: str, arguments: Dict[str, Any], server: Optional[str] = None) -> CallToolResult:
+        """Call a tool on the least busy session.
+
+        Args:
+            name: Tool name
+            arguments: Tool arguments
+            server: Server name; may be omitted when the pool has a single server
+
+        Returns:
+            The tool result.
+        """
+        async with self.session(server) as session:
+            return await session.call_tool(name, arguments)
+
+    async def list_tools(self, server: Optional[str] = None) -> ListToolsResult:
+        """List the tools of a server.
+
+        Args:
+            server: Server name; may be omitted when the pool has a single server
+
+        Returns:
+            The server's tool list.
+        """
+        async with self.session(server) as session:
+            return await session.list_tools()
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Return the state of every session, for logging and benchmarks."""
+        return [
+            {"server": conn.server_name, "healthy": conn.healthy, "in_flight": conn.in_flight}
+            for conn in self.connections
+        ]
+
+    def _schedule_reconnect(self, conn: PooledConnection) -> None:
+        if self._closing or conn in self._reconnecting:
+            return
+        conn.healthy = False
+        self._reconnecting[conn] = asyncio.create_task(self._reconnect(conn))
+
+    async def _reconnect(self, conn: PooledConnection) -> None:
+        """Reopen a broken session, backing off exponentially between attempts."""
+        delay = 0.5
+        try:
+            await conn.close()
+            while not self._closing:
+                try:
+                    await conn.open()
+                    return
+                except Exception:
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, 30.0)
+        finally:
+            self._reconnecting.pop(conn, None)
+
+    async def _ping(self, conn: PooledConnection) -> None:
+        try:
+            await asyncio.wait_for(conn.session.send_ping(), self.ping_timeout)
+        except Exception:
+            self._schedule_reconnect(conn)
+
+    async def _health_loop(self) -> None:
+        """Periodically ping idle sessions and reconnect dead ones."""
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            pings = []
+            for conn in self.connections:
+                if not conn.healthy:
+                    self._schedule_reconnect(conn)
+                elif conn.in_flight == 0:
+                    pings.append(self._ping(conn))
+            await asyncio.gather(*pings)
+
+    async def close(self, drain_timeout: float = 30.0) -> None:
+        """Stop accepting requests, wait for in-flight ones, then close every session.
+
+        Args:
+            drain_timeout: Seconds to wait for in-flight requests before closing anyway
+        """
+        self._closing = True
+        if self._health_task is not None:
+            self._health_task.cancel()
+
+        try:
+            async with self._drained:
+                await asyncio.wait_for(self._drained.wait_for(lambda: self._in_flight == 0), drain_timeout)
+        except asyncio.TimeoutError:
+            pass
+
+        for task in list(self._reconnecting.values()):
+            task.cancel()
+        await asyncio.gather(*(conn.close() for conn in self.connections))
@@ -0,0 +1,118 @@
+"""Gateway that presents several MCP servers as one.
+
+The gateway connects to every server concurrently, merges their tool
+catalogs under namespaced names (`<server>__<tool>`), and routes each
+`call_tool` to the server that owns the tool over pooled sessions. It has
+the same `list_tools`/`call_tool` methods as a `ClientSession`, so the
+workshop clients can use it in place of a single session.
+
+Run it directly to print the merged catalog and the startup time:
+
+    python -m common.gateway
+"""
+
+import asyncio
+import os
+import sys
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from mcp import StdioServerParameters
+from mcp.types import CallToolResult, ListToolsResult, Tool
+
+from common.connection_pool import MCPConnectionPool
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SEPARATOR = "__"
+
+
+def _server_params(script: str) -> StdioServerParameters:
+    path = os.path.join(ROOT, script)
+    return StdioServerParameters(command=sys.executable, args=[path], cwd=os.path.dirname(path))
+
+
+# The servers built in this workshop
+WORKSHOP_SERVERS = {
+    "kb": _server_params("module-1/server.py"),
+    "weather": _server_params("exercises/exercise-0/solution/server.py"),
+    "travel": _server_params("exercises/exercise-1/solution/travel_server.py"),
+}
+
+
+class MCPGateway:
+    """Aggregate the tools of several MCP servers behind one interface.
+
+    Args:
+        servers: Mapping of server name (used as the tool namespace) to spawn parameters
+        pool_size: Number of sessions kept open per server
+    """
+
+    def __init__(self, servers: Optional[Dict[str, StdioServerParameters]] = None, pool_size: int = 1):
+        self.servers = servers or WORKSHOP_SERVERS
+        for name in self.servers:
+            if SEPARATOR in name:
+                raise ValueError(f"Server name '{name}' must not contain '{SEPARATOR}'")
+        self.pool = MCPConnectionPool(self.servers, size=pool_size)
+        self.routes: Dict[str, Tuple[str, str]] = {}
+        self.tools: Dict[str, Tool] = {}
+
+    async def start(self) -> None:
+        """Connect to every server and build the merged tool catalog.
+
+        All handshakes and tool listings run concurrently, so startup takes
+        about as long as the slowest server rather than the sum of all.
+        """
+        await self.pool.start()
+        names = list(self.servers)
+        results = await asyncio.gather(*(self.pool.list_tools(server=name) for name in names))
+
+        for server, result in zip(names, results):
+            for tool in result.tools:
+                namespaced = f"{server}{SEPARATOR}{tool.name}"
+                self.routes[namespaced] = (server, tool.name)
+                self.tools[namespaced] = tool.model_copy(update={
+                    "name": namespaced,
+                    "description": f"[{server}] {tool.description or ''}".strip(),
+                })
+
+    async def list_tools(self) -> ListToolsResult:
+        """Return the merged tool catalog with namespaced tool names."""
+        return ListToolsResult(tools=list(self.tools.values()))
+
+    async def call_tool(self, name: str, arguments: Optional[Dict[str, Any]] = None) -> CallToolResult:
+        """Call a namespaced tool on the server that owns it.
+
+        Args:
+            name: Namespaced tool name, e.g. "travel__book_trip"
+            arguments: Tool arguments
+
+        Returns:
+            The tool result from the owning server.
+
+        Raises:
+            ValueError: If no server provides the tool.
+        """
+        if name not in self.routes:
+            raise ValueError(f"Unknown tool '{name}'")
+        server, tool_name = self.routes[name]
+        return await self.pool.call_tool(tool_name, arguments or {}, server=server)
+
+    async def close(self) -> None:
+        """Drain in-flight calls and disconnect from every server."""
+        await self.pool.close()
+
+
+async def main():
+    gateway = MCPGateway()
+    start = time.perf_counter()
+    try:
+        await gateway.start()
+        print(f"✅ Connected to {len(gateway.servers)} servers in {time.perf_counter() - start:.2f}s")
+        for name, tool in gateway.tools.items():
+            print(f"  - {name}: {tool.description.splitlines()[0]}")
+    finally:
+        await gateway.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,241 @@
+"""Response cache for OpenAI chat completions.
+
+Identical requests (same model, messages, tool schemas and tool results)
+get the same answer from the cache instead of another API round trip,
+which helps with FAQ-style questions such as "What is our company's
+vacation policy?".
+
+* Keys are a SHA-256 of the canonical JSON of the request.
+* Lookups are exact matches against an in-memory LRU, optionally backed by
+  an on-disk LRU store with a size cap that survives restarts.
+* Turns that involve mutating tools (bookings, KB edits) are never cached:
+  neither a response that asks for such a tool nor the answer that follows
+  its result.
+* `stats` counts hits, misses and bypasses and the API latency saved.
+
+Example:
+
+    cache = LLMResponseCache(disk_dir=".llm_cache", mutating_tools={"book_trip"})
+    response = cache.create(client, model="gpt-4", messages=messages, tools=tools)
+    print(cache.report())
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+
+from openai.types.chat import ChatCompletion
+
+
+def _plain(value: Any) -> Any:
+    """Convert OpenAI/pydantic objects inside a request to plain JSON data."""
+    if hasattr(value, "model_dump"):
+        return value.model_dump(exclude_none=True)
+    if isinstance(value, dict):
+        return {k: _plain(v) for k, v in value.items() if v is not None}
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    return value
+
+
+def canonical_key(**request: Any) -> str:
+    """Return a stable hash of a chat completion request.
+
+    Args:
+        **request: The keyword arguments passed to `chat.completions.create`
+
+    Returns:
+        A hex SHA-256 digest that only depends on the request's content.
+    """
+    canonical = json.dumps(_plain(request), sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _tool_name(name: str) -> str:
+    # Gateway tools are namespaced as <server>__<tool>
+    return name.rsplit("__", 1)[-1]
+
+
+class LLMResponseCache:
+    """Exact-match cache of chat completion responses.
+
+    Args:
+        max_entries: Number of responses kept in memory
+        disk_dir: Directory for the persistent store, or None for memory only
+        max_disk_bytes: Size cap of the persistent store; least recently used entries are evicted
+        mutating_tools: Names of tools with side effects; turns using them are not cached
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        disk_dir: Optional[str] = None,
+        max_disk_bytes: int = 64 * 1024 * 1024,
+        mutating_tools: Iterable[str] = (),
+    ):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.mutating_tools = set(mutating_tools)
+        self.stats = {"hits": 0, "misses": 0, "bypassed": 0, "saved_seconds": 0.0}
+
+        # key -> (response data, seconds the API took to produce it)
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # key -> file size, least recently used first
+        self._disk_index: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_bytes = 0
+        if disk_dir:
+            self._load_disk_index()
+
+    def _load_disk_index(self) -> None:
+        os.makedirs(self.disk_dir, exist_ok=True)
+        entries = []
+        for filename in os.listdir(self.disk_dir):
+            if filename.endswith(".json"):
+                stat = os.stat(os.path.join(self.disk_dir, filename))
+                entries.append((stat.st_mtime, filename[:-5], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._disk_index[key] = size
+            self._disk_bytes += size
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def is_mutating_turn(self, messages: List[Any]) -> bool:
+        """Return True if the current turn already called a mutating tool.
+
+        The current turn is everything after the last user message.
+        """
+        for message in reversed(messages):
+            message = _plain(message)
+            if message.get("role") == "user":
+                return False
+            for tool_call in message.get("tool_calls") or []:
+                if _tool_name(tool_call["function"]["name"]) in self.mutating_tools:
+                    return True
+        return False
+
+    def _requests_mutating_tool(self, response: ChatCompletion) -> bool:
+        tool_calls = response.choices[0].message.tool_calls or []
+        return any(_tool_name(tc.function.name) in self.mutating_tools for tc in tool_calls)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up a cached entry by key, refreshing its LRU position."""
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return self._memory[key]
+
+        if self.disk_dir and key in self._disk_index:
+            try:
+                with open(self._disk_path(key), "r") as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                self._disk_bytes -= self._disk_index.pop(key)
+                return None
+            os.utime(self._disk_path(key))
+            self._disk_index.move_to_end(key)
+            self._remember(key, entry)
+            return entry
+        return None
+
+    def put(self, key: str, response: ChatCompletion, latency: float) -> None:
+        """Store a response in memory and, if configured, on disk."""
+        entry = {"response": response.model_dump(mode="json"), "latency": latency}
+        self._remember(key, entry)
+
+        if self.disk_dir:
+            data = json.dumps(entry, separators=(",", ":")).encode("utf-8")
+            fd, tmp_path = tempfile.mkstemp(dir=self.disk_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self._disk_path(key))
+
+            self._disk_bytes += len(data) - self._disk_index.pop(key, 0)
+            self._disk_index[key] = len(data)
+            while self._disk_bytes > self.max_disk_bytes and len(self._disk_index) > 1:
+                old_key, size = self._disk_index.popitem(last=False)
+                self._disk_bytes -= size
+                try:
+                    os.unlink(self._disk_path(old_key))
+                except FileNotFoundError:
+                    pass
+
+    def _remember(self, key: str, entry: Dict[str, Any]) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _lookup(self, request: Dict[str, Any]) -> Optional[ChatCompletion]:
+        entry = self.get(canonical_key(**request))
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        self.stats["saved_seconds"] += entry["latency"]
+        return ChatCompletion.model_validate(entry["response"])
+
+    def _store(self, request: Dict[str, Any], response: ChatCompletion, latency: float) -> None:
+        if self._requests_mutating_tool(response):
+            return
+        self.put(canonical_key(**request), response, latency)
+
+    def create(self, client, **request: Any) -> ChatCompletion:
+        """Cached drop-in for `client.chat.completions.create` (sync client).
+
+        Args:
+            client: An `openai.OpenAI` client
+            **request: Arguments for `chat.completions.create`
+
+        Returns:
+            The cached or freshly created completion.
+        """
+        if self.is_mutating_turn(request.get("messages", [])):
+            self.stats["bypassed"] += 1
+            return client.chat.completions.create(**request)
+
+        cached = self._lookup(request)
+        if cached is not None:
+            return cached
+
+        start = time.perf_counter()
+        response = client.chat.completions.create(**request)
+        self._store(request, response, time.perf_counter() - start)
+        return response
+
+    async def acreate(self, client, **request: Any) -> ChatCompletion:
+        """Cached drop-in for `client.chat.completions.create` (async client).
+
+        Args:
+            client: An `openai.AsyncOpenAI` client
+            **request: Arguments for `chat.completions.create`
+
+        Returns:
+            The cached or freshly created completion.
+        """
+        if self.is_mutating_turn(request.get("messages", [])):
+            self.stats["bypassed"] += 1
+            return await client.chat.completions.create(**request)
+
+        cached = self._lookup(request)
+        if cached is not None:
+            return cached
+
+        start = time.perf_counter()
+        response = await client.chat.completions.create(**request)
+        self._store(request, response, time.perf_counter() - start)
+        return response
+
+    def report(self) -> str:
+        """Summarize hit rate and saved latency."""
+        lookups = self.stats["hits"] + self.stats["misses"]
+        hit_rate = self.stats["hits"] / lookups if lookups else 0.0
+        return (
+            f"LLM cache: {self.stats['hits']} hits, {self.stats['misses']} misses, "
+            f"{self.stats['bypassed']} bypassed (hit rate {hit_rate:.0%}), "
+            f"saved {self.stats['saved_seconds']:.1f}s of API latency"
+        )
@@ -0,0 +1,306 @@
+"""Opt-in profiling for MCP tool handlers.
+
+Decorate tools with a `ToolProfiler` and a random sample of their
+invocations is profiled:
+
+    profiler = ToolProfiler.for_server(mcp)
+
+    @mcp.tool()
+    @profiler.profile
+    def book_trip(...): ...
+
+Only sync tools can be profiled. Stacks are sampled per thread, and async
+tools share the event loop's thread, so samples taken during one coroutine
+would be charged to whichever other coroutine happens to be running.
+
+While a sampled call runs, a background thread records the call's Python
+stack every `interval` seconds (a statistical profiler, so the tool itself
+is not slowed down the way cProfile would slow it). Stacks are aggregated
+per tool and written as collapsed-stack files, one line per unique stack:
+
+    book_trip;book_trip (travel_server.py:233);commit (booking_store.py:32) 17
+
+which flamegraph.pl, speedscope or inferno turn into flamegraphs. File
+names carry the process ID (`book_trip.12345.collapsed`), so the workers of
+a multi-process server don't overwrite each other's profiles. With
+memory tracking on, tracemalloc also snapshots the heap around sampled
+calls, and the top-N allocation sites per tool are written next to the
+stacks.
+
+Configuration (environment):
+
+    MCP_PROFILE_RATE      fraction of calls to sample, e.g. 0.01 (default 0: off)
+    MCP_PROFILE_MEMORY    1 to track allocations of sampled calls with tracemalloc
+    MCP_PROFILE_DIR       where profiles are written (default ./profiles)
+    MCP_PROFILE_ADMIN     1 to add the set_profiling/dump_profiles admin tools
+
+Profiles are written when the server exits and whenever the dump_profiles
+admin tool is called. Forked workers that leave with `os._exit` (serve_http
+workers, warm pool children) skip atexit, so they call `dump_all_profiles()`
+first. Calls that are not sampled cost one random number,
+and sampled calls run at full speed, so stack sampling is safe to leave on
+in production at a small rate. Memory tracking is not: tracemalloc slows
+every allocation while it runs, and each sampled call takes two heap
+snapshots, which can add hundreds of milliseconds in a large process.
+Enable it only while investigating.
+"""
+
+import atexit
+import functools
+import inspect
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+import weakref
+from collections import Counter, defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Every profiler in this process, for dump_all_profiles()
+_profilers: "weakref.WeakSet[ToolProfiler]" = weakref.WeakSet()
+
+
+def dump_all_profiles() -> None:
+    """Write the profiles of every profiler in this process that sampled anything."""
+    for profiler in list(_profilers):
+        profiler._dump_at_exit()
+
+
+class StackSampler:
+    """Background thread sampling the stacks of threads that are running a profiled call."""
+
+    def __init__(self, interval: float = 0.005, max_depth: int = 64):
+        self.interval = interval
+        self.max_depth = max_depth
+        # Thread ID -> tool name for calls being profiled right now
+        self.active: Dict[int, str] = {}
+        self.stacks: Dict[str, Counter] = defaultdict(Counter)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, tool: str) -> None:
+        with self._lock:
+            self.active[threading.get_ident()] = tool
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="tool-profiler", daemon=True)
+                self._thread.start()
+
+    def stop(self) -> None:
+        with self._lock:
+            self.active.pop(threading.get_ident(), None)
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self.active:
+                    # Exit when idle; the next sampled call starts a new thread
+                    self._thread = None
+                    return
+                active = dict(self.active)
+            frames = sys._current_frames()
+            samples = [(tool, self._collapse(frames[thread_id])) for thread_id, tool in active.items() if thread_id in frames]
+            with self._lock:
+                for tool, stack in samples:
+                    self.stacks[tool][stack] += 1
+
+    def snapshot(self) -> Dict[str, Counter]:
+        """Return a copy of the aggregated stacks per tool."""
+        with self._lock:
+            return {tool: Counter(stacks) for tool, stacks in self.stacks.items()}
+
+    def _collapse(self, frame: Any) -> str:
+        names = []
+        while frame is not None and len(names) < self.max_depth:
+            code = frame.f_code
+            names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+
+class ToolProfiler:
+    """Sample tool invocations and aggregate their stacks and allocations per tool.
+
+    Args:
+        sample_rate: Fraction of calls to profile (0 disables profiling)
+        output_dir: Directory profiles are written to
+        track_memory: Also compare tracemalloc snapshots around sampled calls
+        top_n: Allocation sites kept per tool
+        interval: Seconds between stack samples
+    """
+
+    def __init__(self, sample_rate: float = 0.0, output_dir: str = "profiles", track_memory: bool = False,
+                 top_n: int = 20, interval: float = 0.005):
+        self.output_dir = output_dir
+        self.top_n = top_n
+        self.sampler = StackSampler(interval)
+        self.calls: Counter = Counter()
+        self.sampled: Counter = Counter()
+        self.sampled_seconds: Counter = Counter()
+        # (tool, allocation site) -> (bytes, blocks) allocated by sampled calls and still alive after them
+        self.allocations: Dict[Tuple[str, str], List[int]] = defaultdict(lambda: [0, 0])
+        self._memory_lock = threading.Lock()
+        self.sample_rate = 0.0
+        self.track_memory = False
+        self.configure(sample_rate, track_memory)
+        atexit.register(self._dump_at_exit)
+        _profilers.add(self)
+
+    @classmethod
+    def from_env(cls) -> "ToolProfiler":
+        """Build a profiler from the MCP_PROFILE_* environment variables."""
+        return cls(
+            sample_rate=float(os.getenv("MCP_PROFILE_RATE", "0")),
+            output_dir=os.getenv("MCP_PROFILE_DIR", "profiles"),
+            track_memory=os.getenv("MCP_PROFILE_MEMORY") == "1",
+        )
+
+    @classmethod
+    def for_server(cls, mcp: Any) -> "ToolProfiler":
+        """Build a profiler from the environment for a server.
+
+        Also adds the admin tools to `mcp` when MCP_PROFILE_ADMIN=1.
+        """
+        profiler = cls.from_env()
+        if os.getenv("MCP_PROFILE_ADMIN") == "1":
+            profiler.register_admin_tools(mcp)
+        return profiler
+
+    def configure(self, sample_rate: float, track_memory: bool) -> None:
+        """Change the sampling rate and memory tracking at run time."""
+        self.sample_rate = max(0.0, min(1.0, sample_rate))
+        if track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start(1)
+        elif not track_memory and self.track_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.track_memory = track_memory
+
+    def profile(self, fn: F) -> F:
+        """Decorator that samples calls of a sync tool function.
+
+        Raises:
+            TypeError: If `fn` is a coroutine function.
+        """
+        tool = fn.__name__
+        if inspect.iscoroutinefunction(fn):
+            raise TypeError(f"Cannot profile async tool {tool}: stacks are sampled per thread")
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            self.calls[tool] += 1
+            if not self.sample_rate or random.random() >= self.sample_rate:
+                return fn(*args, **kwargs)
+            before = self._begin(tool)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._end(tool, time.perf_counter() - start, before)
+        return wrapper
+
+    def _begin(self, tool: str) -> Optional[tracemalloc.Snapshot]:
+        before = tracemalloc.take_snapshot() if self.track_memory and tracemalloc.is_tracing() else None
+        self.sampler.start(tool)
+        return before
+
+    def _end(self, tool: str, duration: float, before: Optional[tracemalloc.Snapshot]) -> None:
+        self.sampler.stop()
+        self.sampled[tool] += 1
+        self.sampled_seconds[tool] += duration
+        if before is None or not tracemalloc.is_tracing():
+            return
+        diff = tracemalloc.take_snapshot().compare_to(before, "lineno")
+        with self._memory_lock:
+            for stat in diff[:self.top_n]:
+                site = str(stat.traceback[0])
+                totals = self.allocations[(tool, site)]
+                totals[0] += stat.size_diff
+                totals[1] += stat.count_diff
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Calls, sampled calls, mean sampled duration and stack samples per tool."""
+        stacks = self.sampler.snapshot()
+        return {
+            tool: {
+                "calls": self.calls[tool],
+                "sampled": self.sampled[tool],
+                "mean_sampled_ms": round(self.sampled_seconds[tool] / self.sampled[tool] * 1000, 3) if self.sampled[tool] else None,
+                "stack_samples": sum(stacks.get(tool, {}).values()),
+            }
+            for tool in sorted(self.calls)
+        }
+
+    def dump(self, output_dir: Optional[str] = None) -> List[str]:
+        """Write collapsed stacks and allocation reports.
+
+        Writes `<tool>.<pid>.collapsed` per tool, `all.<pid>.collapsed` with
+        the tool name as the root frame, and `<tool>.<pid>.memory.txt` when
+        allocations were tracked.
+
+        Returns:
+            Paths of the written files.
+        """
+        output_dir = output_dir or self.output_dir
+        os.makedirs(output_dir, exist_ok=True)
+        written = []
+        pid = os.getpid()
+
+        combined = []
+        for tool, stacks in sorted(self.sampler.snapshot().items()):
+            lines = [f"{stack} {count}" for stack, count in stacks.most_common()]
+            combined.extend(f"{tool};{line}" for line in lines)
+            written.append(self._write(output_dir, f"{tool}.{pid}.collapsed", lines))
+        if combined:
+            written.append(self._write(output_dir, f"all.{pid}.collapsed", combined))
+
+        with self._memory_lock:
+            by_tool: Dict[str, List[Tuple[str, int, int]]] = defaultdict(list)
+            for (tool, site), (size, count) in self.allocations.items():
+                by_tool[tool].append((site, size, count))
+        for tool, sites in sorted(by_tool.items()):
+            sites.sort(key=lambda site: -site[1])
+            lines = [f"Top allocation sites of {self.sampled[tool]} sampled {tool} calls (net bytes, net blocks):"]
+            lines += [f"{size:>12,d} B {count:>8,d}  {site}" for site, size, count in sites[:self.top_n]]
+            written.append(self._write(output_dir, f"{tool}.{pid}.memory.txt", lines))
+        return written
+
+    @staticmethod
+    def _write(output_dir: str, filename: str, lines: List[str]) -> str:
+        path = os.path.join(output_dir, filename)
+        with open(path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        return path
+
+    def _dump_at_exit(self) -> None:
+        if any(self.sampled.values()):
+            self.dump()
+
+    def register_admin_tools(self, mcp: Any) -> None:
+        """Add tools to change profiling settings and write profiles on demand."""
+
+        @mcp.tool()
+        def set_profiling(sample_rate: float, track_memory: bool = False) -> Dict[str, Any]:
+            """Admin: change tool profiling settings.
+
+            Args:
+                sample_rate: Fraction of tool calls to profile, 0 to 1 (0 turns profiling off)
+                track_memory: Track allocations of sampled calls with tracemalloc
+
+            Returns:
+                The new settings.
+            """
+            self.configure(sample_rate, track_memory)
+            return {"sample_rate": self.sample_rate, "track_memory": self.track_memory}
+
+        @mcp.tool()
+        def dump_profiles() -> Dict[str, Any]:
+            """Admin: write collected tool profiles (collapsed stacks, allocation reports) to disk.
+
+            Returns:
+                Per-tool call and sample counts and the written file paths.
+            """
+            return {"tools": self.summary(), "files": self.dump()}
@@ -0,0 +1,79 @@
+"""Helpers for keeping LLM request prefixes byte-stable.
+
+OpenAI caches the longest previously seen prompt prefix automatically. The
+tool definitions and system message come first in every request, so any
+drift in them — tool order, JSON key order in a schema — turns a cache hit
+into a miss. `canonical_tools` gives the same bytes for the same tools
+every time, and `PromptCacheStats` records how many prompt tokens the API
+reports as cached.
+"""
+
+import json
+from typing import Any, Dict, List, Optional
+
+
+def canonical_json(value: Any) -> Any:
+    """Return `value` with every dict's keys in sorted order."""
+    return json.loads(json.dumps(value, sort_keys=True))
+
+
+def canonical_tools(tools: List[Any]) -> List[Dict[str, Any]]:
+    """Convert MCP tools to OpenAI tool definitions in a stable order.
+
+    Args:
+        tools: MCP `Tool` objects as returned by `list_tools()`
+
+    Returns:
+        OpenAI tool definitions sorted by name, with canonical schemas.
+    """
+    return [
+        {
+            "type": "function",
+            "function": {
+                "name": tool.name,
+                "description": tool.description,
+                "parameters": canonical_json(tool.inputSchema),
+            },
+        }
+        for tool in sorted(tools, key=lambda tool: tool.name)
+    ]
+
+
+class PromptCacheStats:
+    """Per-request record of prompt tokens, cached prompt tokens and latency."""
+
+    def __init__(self):
+        self.requests: List[Dict[str, float]] = []
+
+    def record(self, usage: Optional[Any], latency: float) -> None:
+        """Record one API response.
+
+        Args:
+            usage: The `usage` field of a chat completion
+            latency: Seconds the request took
+        """
+        if usage is None:
+            return
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = (getattr(details, "cached_tokens", None) or 0) if details else 0
+        self.requests.append({"prompt_tokens": usage.prompt_tokens, "cached_tokens": cached, "latency": latency})
+
+    def report(self) -> str:
+        """Summarize cache hit ratio and latency with and without cached prefixes."""
+        if not self.requests:
+            return "Prompt cache: no requests recorded"
+
+        prompt = sum(r["prompt_tokens"] for r in self.requests)
+        cached = sum(r["cached_tokens"] for r in self.requests)
+        hits = [r["latency"] for r in self.requests if r["cached_tokens"]]
+        misses = [r["latency"] for r in self.requests if not r["cached_tokens"]]
+
+        text = (
+            f"Prompt cache: {cached}/{prompt} prompt tokens cached ({cached / prompt:.0%}) "
+            f"over {len(self.requests)} requests, {len(hits)} with a cached prefix"
+        )
+        if hits and misses:
+            hit_avg = sum(hits) / len(hits)
+            miss_avg = sum(misses) / len(misses)
+            text += f"; avg latency {hit_avg:.2f}s cached vs {miss_avg:.2f}s uncached ({miss_avg - hit_avg:+.2f}s saved per request)"
+        return text
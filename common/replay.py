@@ -0,0 +1,188 @@
+"""Replay recorded tool-call traces against an MCP server.
+
+Usage (from the repository root):
+
+    # Record: any client run with MCP_TRACE_FILE set appends its tool calls
+    MCP_TRACE_FILE=traces/travel.jsonl python exercises/exercise-1/solution/travel_client.py
+
+    # Replay over stdio (spawns the server) at 10x the recorded pace
+    python -m common.replay traces/travel.jsonl --server exercises/exercise-1/solution/travel_server.py --speedup 10
+
+    # Replay over HTTP as fast as possible with 32 calls in flight, five times over
+    python -m common.replay traces/travel.jsonl --url http://127.0.0.1:8051/mcp --speedup 0 --concurrency 32 --repeat 5
+
+Calls are fired at their recorded offsets from the first call, divided by
+`--speedup` (0 sends them as fast as `--concurrency` allows). Traces recorded
+through the gateway carry namespaced tool names such as `travel__book_trip`;
+`--namespace travel` keeps only that server's calls and strips the prefix.
+
+The report shows the latency distribution per tool next to the latency
+recorded in the trace, plus errors and how far calls started behind schedule.
+Replaying booking tools writes bookings, as the original calls did.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from collections import Counter, defaultdict
+from contextlib import AsyncExitStack
+from typing import Any, Dict, List, Optional
+
+import orjson
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.streamable_http import streamablehttp_client
+
+from common.connection_pool import MCPConnectionPool
+from common.gateway import SEPARATOR
+
+
+def load_trace(path: str, namespace: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Read a JSONL trace, optionally keeping only one gateway namespace.
+
+    Args:
+        path: Trace file written by `TraceRecorder`
+        namespace: Gateway server name whose calls to keep (prefix is stripped)
+
+    Returns:
+        Trace records sorted by start time.
+    """
+    records = []
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = orjson.loads(line)
+            if namespace is not None:
+                prefix = f"{namespace}{SEPARATOR}"
+                if record["tool"].startswith(prefix):
+                    record["tool"] = record["tool"][len(prefix):]
+                elif SEPARATOR in record["tool"] or record.get("server") not in (None, namespace):
+                    continue
+            records.append(record)
+    records.sort(key=lambda record: record["ts"])
+    return records
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))]
+
+
+class Replayer:
+    """Fire trace records at a target and collect latencies and errors.
+
+    Args:
+        target: Anything with an MCP-style `call_tool` (a ClientSession or MCPConnectionPool)
+        concurrency: Maximum calls in flight
+        speedup: Divide recorded gaps between calls by this (0 for no gaps)
+    """
+
+    def __init__(self, target: Any, concurrency: int = 8, speedup: float = 1.0):
+        self.target = target
+        self.concurrency = concurrency
+        self.speedup = speedup
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.recorded: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Counter = Counter()
+        self.lag: List[float] = []
+        self.elapsed = 0.0
+
+    async def run(self, records: List[Dict[str, Any]], repeat: int = 1) -> None:
+        if not records:
+            return
+        semaphore = asyncio.Semaphore(self.concurrency)
+        first = records[0]["ts"]
+        span = records[-1]["ts"] - first
+
+        async def fire(record: Dict[str, Any], due: float) -> None:
+            async with semaphore:
+                self.lag.append(max(0.0, time.perf_counter() - due))
+                start = time.perf_counter()
+                try:
+                    result = await self.target.call_tool(record["tool"], record["arguments"])
+                except Exception as e:
+                    self.errors[f"{record['tool']}: {type(e).__name__}: {e}"] += 1
+                    return
+                self.latencies[record["tool"]].append(time.perf_counter() - start)
+                self.recorded[record["tool"]].append(record["duration_ms"] / 1000)
+                if result.isError:
+                    text = result.content[0].text if result.content else "tool error"
+                    self.errors[f"{record['tool']}: {text[:120]}"] += 1
+
+        start = time.perf_counter()
+        tasks = []
+        for round_ in range(repeat):
+            for record in records:
+                offset = (round_ * span + record["ts"] - first) / self.speedup if self.speedup > 0 else 0.0
+                due = start + offset
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                tasks.append(asyncio.create_task(fire(record, due)))
+        await asyncio.gather(*tasks)
+        self.elapsed = time.perf_counter() - start
+
+    def report(self) -> str:
+        calls = len(self.lag)
+        lines = [
+            f"{calls} calls in {self.elapsed:.2f}s ({calls / self.elapsed if self.elapsed else 0:.1f} calls/s), "
+            f"{sum(self.errors.values())} errors, start lag p99 {percentile(self.lag, 0.99) * 1000:.0f}ms",
+            f"{'tool':<28} {'calls':>6} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8} {'recorded p50':>13}",
+        ]
+        for tool in sorted(self.latencies):
+            values = self.latencies[tool]
+            lines.append(
+                f"{tool:<28} {len(values):>6} {percentile(values, 0.5) * 1000:>8.1f} {percentile(values, 0.9) * 1000:>8.1f} "
+                f"{percentile(values, 0.99) * 1000:>8.1f} {max(values) * 1000:>8.1f} "
+                f"{percentile(self.recorded[tool], 0.5) * 1000:>13.1f}"
+            )
+        if self.errors:
+            lines.append("Errors:")
+            for message, count in self.errors.most_common(10):
+                lines.append(f"  {count:>5} x {message}")
+        return "\n".join(lines)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded tool-call trace against an MCP server.")
+    parser.add_argument("trace", help="JSONL trace written with MCP_TRACE_FILE")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--server", help="Server script to spawn over stdio")
+    target.add_argument("--url", help="Streamable HTTP endpoint, e.g. http://127.0.0.1:8051/mcp")
+    parser.add_argument("--speedup", type=float, default=1.0, help="Replay this many times faster than recorded (0 = no gaps)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Maximum calls in flight")
+    parser.add_argument("--repeat", type=int, default=1, help="Replay the trace this many times back to back")
+    parser.add_argument("--namespace", help="Keep only this gateway server's calls and strip its prefix")
+    args = parser.parse_args()
+
+    records = load_trace(args.trace, args.namespace)
+    if not records:
+        raise SystemExit(f"No tool calls to replay in {args.trace}")
+    print(f"Replaying {len(records)} calls x {args.repeat} at speedup {args.speedup or 'max'} "
+          f"with concurrency {args.concurrency}", file=sys.stderr)
+
+    async with AsyncExitStack() as stack:
+        if args.server:
+            path = os.path.abspath(args.server)
+            params = StdioServerParameters(command=sys.executable, args=[path], cwd=os.path.dirname(path))
+            # A few sessions so one server process isn't the only queue
+            pool = MCPConnectionPool({"server": params}, size=min(args.concurrency, 4))
+            await pool.start()
+            stack.push_async_callback(pool.close)
+            target = pool
+        else:
+            read, write, _ = await stack.enter_async_context(streamablehttp_client(args.url))
+            target = await stack.enter_async_context(ClientSession(read, write))
+            await target.initialize()
+
+        replayer = Replayer(target, concurrency=args.concurrency, speedup=args.speedup)
+        await replayer.run(records, repeat=args.repeat)
+    print(replayer.report())
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,258 @@
+"""Timeouts, retries, circuit breaking and stale fallbacks for upstream calls.
+
+Async tools that call external services (e.g. the weather server calling
+Open-Meteo) wrap the call in `call_upstream`:
+
+    breaker = CircuitBreaker("open-meteo")
+    cache = StaleCache(max_age=3600)
+
+    with deadline(request_timeout(ctx, default=10.0)):
+        data, stale = await call_upstream(fetch, breaker=breaker, cache=cache, cache_key=(lat, lon))
+
+`fetch` is a coroutine function, so waiting on the upstream (and backing
+off between retries) never blocks the event loop that serves every other
+request.
+
+* `deadline` sets a time budget for everything inside the block. Clients
+  can pass their own budget in the request metadata, e.g.
+  `session.call_tool(name, args, meta={"timeout": 5})`, and
+  `request_timeout` reads it from the tool's Context.
+* Each attempt gets at most `attempt_timeout` seconds and never more than
+  what is left of the deadline.
+* Idempotent calls are retried with full-jitter exponential backoff.
+* A `CircuitBreaker` fails fast after repeated failures instead of letting
+  every request wait for a dead upstream, and lets one trial call through
+  after `reset_timeout`.
+* With a `StaleCache`, the last good value is served (flagged as stale)
+  when the breaker is open or all attempts fail.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterator, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+_deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """The time budget for the current request ran out."""
+
+
+class CircuitOpenError(RuntimeError):
+    """The circuit breaker is open, so the upstream call was not attempted."""
+
+
+@contextmanager
+def deadline(seconds: Optional[float]) -> Iterator[None]:
+    """Limit everything inside the block to `seconds` (None for no limit).
+
+    Nested deadlines never extend an outer one.
+    """
+    if seconds is None:
+        yield
+        return
+    new = time.monotonic() + seconds
+    outer = _deadline.get()
+    token = _deadline.set(new if outer is None else min(outer, new))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def time_remaining() -> Optional[float]:
+    """Seconds left before the current deadline, or None if there is none."""
+    current = _deadline.get()
+    return None if current is None else current - time.monotonic()
+
+
+def request_timeout(ctx: Any, default: Optional[float]) -> Optional[float]:
+    """Read the client's time budget from a tool's Context.
+
+    Args:
+        ctx: The FastMCP Context injected into the tool, or None
+        default: Budget to use when the client did not send one
+
+    Returns:
+        The `timeout` (seconds) from the request's `_meta`, or `default`.
+    """
+    try:
+        meta = ctx.request_context.meta
+    except Exception:
+        return default
+    timeout = getattr(meta, "timeout", None)
+    return float(timeout) if isinstance(timeout, (int, float)) and timeout > 0 else default
+
+
+class CircuitBreaker:
+    """Classic closed / open / half-open circuit breaker.
+
+    Args:
+        name: Name used in error messages
+        failure_threshold: Consecutive failures that open the circuit
+        reset_timeout: Seconds to stay open before allowing a trial call
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_progress = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Return True if a call may be attempted now."""
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+            if self.state == "half_open" and not self._trial_in_progress:
+                self._trial_in_progress = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._trial_in_progress = False
+
+    def release_trial(self) -> None:
+        with self._lock:
+            self._trial_in_progress = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._trial_in_progress = False
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+
+class StaleCache:
+    """Last known good value per key, kept for `max_age` seconds."""
+
+    def __init__(self, max_age: float = 3600.0, max_entries: int = 10000):
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            if len(self._entries) >= self.max_entries and key not in self._entries:
+                # Drop the oldest entry
+                oldest = min(self._entries, key=lambda k: self._entries[k][0])
+                del self._entries[oldest]
+            self._entries[key] = (time.monotonic(), value)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry[0] > self.max_age:
+            return None
+        return entry[1]
+
+
+async def call_upstream(
+    fn: Callable[[float], Awaitable[T]],
+    breaker: Optional[CircuitBreaker] = None,
+    cache: Optional[StaleCache] = None,
+    cache_key: Hashable = None,
+    attempts: int = 3,
+    attempt_timeout: float = 5.0,
+    base_delay: float = 0.2,
+    max_delay: float = 2.0,
+    idempotent: bool = True,
+    retryable: Callable[[Exception], bool] = lambda e: True,
+) -> Tuple[T, bool]:
+    """Call an upstream service with a timeout, retries and a circuit breaker.
+
+    Args:
+        fn: The call to make; receives the timeout (seconds) for this attempt
+            and returns an awaitable, which is cancelled when the timeout runs out
+        breaker: Circuit breaker guarding the upstream
+        cache: Where to keep the last good result and find a stale fallback
+        cache_key: Key of this call's result in `cache`
+        attempts: Maximum attempts (only the first is made if not idempotent)
+        attempt_timeout: Upper bound on a single attempt's timeout
+        base_delay: Backoff before the first retry; doubles every retry
+        max_delay: Upper bound on the backoff
+        idempotent: Whether it is safe to repeat the call
+        retryable: Returns False for errors that retrying cannot fix; those
+            are raised immediately and do not count against the breaker
+
+    Returns:
+        Tuple of (result, stale). `stale` is True when the result came from
+        the cache because the upstream could not be reached.
+
+    Raises:
+        CircuitOpenError: If the breaker is open and there is no cached value.
+        DeadlineExceeded: If the deadline ran out and there is no cached value.
+        Exception: The last error from `fn` if every attempt failed and there
+            is no cached value.
+    """
+    def fallback(error: Exception) -> Tuple[T, bool]:
+        if cache is not None:
+            stale = cache.get(cache_key)
+            if stale is not None:
+                return stale, True
+        raise error
+
+    if breaker is not None and not breaker.allow():
+        return fallback(CircuitOpenError(f"Circuit for {breaker.name} is open"))
+
+    max_attempts = attempts if idempotent else 1
+    upstream_failed = False
+    error: Exception = DeadlineExceeded("Deadline exceeded before calling upstream")
+    for attempt in range(max_attempts):
+        remaining = time_remaining()
+        if remaining is not None and remaining <= 0:
+            break
+        timeout = attempt_timeout if remaining is None else min(attempt_timeout, remaining)
+
+        try:
+            # Enforced here too, in case `fn` doesn't pass the timeout on
+            result = await asyncio.wait_for(fn(timeout), timeout)
+        except Exception as e:
+            if not retryable(e):
+                # The upstream answered; the request itself is at fault
+                if breaker is not None:
+                    breaker.record_success()
+                raise
+            error = e
+            upstream_failed = True
+            if attempt == max_attempts - 1:
+                break
+            # Full jitter: sleep a random time up to the exponential backoff
+            delay = random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+            remaining = time_remaining()
+            if remaining is not None and delay >= remaining:
+                break
+            await asyncio.sleep(delay)
+            continue
+
+        if breaker is not None:
+            breaker.record_success()
+        if cache is not None:
+            cache.put(cache_key, result)
+        return result, False
+
+    if breaker is not None:
+        if upstream_failed:
+            breaker.record_failure()
+        else:
+            # No attempt was made, so release a half-open trial slot
+            breaker.release_trial()
+    return fallback(error)
@@ -0,0 +1,322 @@
+"""Serve a FastMCP server over streamable HTTP with several worker processes.
+
+Usage (from the repository root):
+
+    python -m common.serve_http exercises/exercise-1/solution/travel_server.py --workers 4
+    python -m common.serve_http module-1/server.py --workers 4 --port 8050
+
+The supervisor forks one process per worker. On platforms with SO_REUSEPORT
+(Linux, macOS) every worker binds its own listening socket on the same port
+and the kernel load-balances new connections between them; elsewhere the
+supervisor binds a single socket before forking and the workers share it.
+
+The supervisor imports the server script once and the workers inherit it
+through fork, so a server must not start threads or event loops at import
+time. A worker that exits is restarted after a delay that doubles with each
+quick consecutive exit; after MAX_QUICK_EXITS of them the supervisor stops
+the other workers and exits with status 1 rather than respawning forever.
+
+Workers serve the app in stateless mode with plain JSON responses, so any
+worker can answer any request. Servers must therefore keep shared state out
+of process memory (the travel server keeps it in its booking store).
+
+Pass --max-in-flight, --client-rate or --tool-rate to put admission control
+(common/admission.py) in front of the app. Limits apply per worker, so the
+server-wide in-flight bound is ``--workers`` times ``--max-in-flight``.
+Both mcp.server.fastmcp servers (module-1, travel) and standalone fastmcp
+servers (the weather server) are supported.
+"""
+
+import argparse
+import importlib.util
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+from types import ModuleType
+from typing import Any, Dict, Optional, Tuple
+
+from common.admission import AdmissionController, AdmissionMiddleware
+from common.profiling import dump_all_profiles
+
+# A worker that exits within QUICK_EXIT seconds of starting counts as a quick
+# exit. Restarts wait RESTART_DELAY, doubled per consecutive quick exit of the
+# same worker up to MAX_RESTART_DELAY; MAX_QUICK_EXITS in a row stop the server.
+QUICK_EXIT = 10.0
+RESTART_DELAY = 0.5
+MAX_RESTART_DELAY = 30.0
+MAX_QUICK_EXITS = 5
+
+
+def load_server(script_path: str) -> ModuleType:
+    """Import a server script without running its ``__main__`` block.
+
+    Args:
+        script_path: Path to a script defining a module-level ``mcp`` FastMCP instance.
+
+    Returns:
+        The imported module.
+    """
+    script_path = os.path.abspath(script_path)
+    # Let the server import its sibling modules (e.g. booking_store)
+    sys.path.insert(0, os.path.dirname(script_path))
+
+    spec = importlib.util.spec_from_file_location("mcp_server", script_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    if not hasattr(module, "mcp"):
+        raise SystemExit(f"{script_path} does not define a module-level `mcp` server")
+    return module
+
+
+def bind_socket(host: str, port: int, reuse_port: bool) -> socket.socket:
+    """Create a listening TCP socket.
+
+    Args:
+        host: Interface to bind
+        port: Port to bind
+        reuse_port: Whether to set SO_REUSEPORT so several processes can bind the same port
+
+    Returns:
+        The bound, listening socket.
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def server_defaults(server: Any) -> Tuple[str, int]:
+    """Return the host and port a server is configured for.
+
+    mcp.server.fastmcp servers carry them in ``settings``; standalone fastmcp
+    servers take them at run time, so fall back to localhost:8000.
+    """
+    settings = getattr(server, "settings", None)
+    return getattr(settings, "host", "127.0.0.1"), getattr(settings, "port", 8000)
+
+
+def http_app(server: Any) -> Any:
+    """Build a stateless, JSON-response streamable HTTP app for ``server``."""
+    if hasattr(server, "streamable_http_app"):
+        server.settings.stateless_http = True
+        server.settings.json_response = True
+        return server.streamable_http_app()
+    return server.http_app(path="/mcp", stateless_http=True, json_response=True)
+
+
+def run_worker(
+    server: Any,
+    host: str,
+    port: int,
+    sock: Optional[socket.socket],
+    log_level: str,
+    admission: Optional[Dict[str, Any]] = None,
+) -> None:
+    """Run one uvicorn worker serving the server's streamable HTTP app.
+
+    Args:
+        server: The FastMCP server, from ``load_server(...).mcp``
+        host: Interface to bind when ``sock`` is None
+        port: Port to bind when ``sock`` is None
+        sock: Socket inherited from the supervisor, or None to bind with SO_REUSEPORT
+        log_level: uvicorn log level
+        admission: AdmissionController arguments, or None to admit everything
+    """
+    import uvicorn
+
+    # FastMCP configures INFO logging on import; per-request logs cost throughput
+    logging.getLogger().setLevel(log_level.upper())
+    app = http_app(server)
+    if admission is not None:
+        app = AdmissionMiddleware(app, AdmissionController(**admission))
+
+    if sock is None:
+        sock = bind_socket(host, port, reuse_port=True)
+
+    config = uvicorn.Config(app, log_level=log_level, access_log=False)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def supervise(
+    script_path: str,
+    server: Any,
+    host: str,
+    port: int,
+    workers: int,
+    log_level: str,
+    admission: Optional[Dict[str, Any]] = None,
+) -> int:
+    """Fork the worker processes and restart any that exit unexpectedly.
+
+    Args:
+        script_path: Path to the server script, for messages
+        server: The FastMCP server, imported once here and inherited by the workers
+        host: Interface to bind
+        port: Port to bind
+        workers: Number of worker processes
+        log_level: uvicorn log level
+        admission: AdmissionController arguments for each worker, or None
+
+    Returns:
+        The exit status: 0 after a normal stop, 1 if a worker kept exiting.
+    """
+    reuse_port = hasattr(socket, "SO_REUSEPORT")
+    shared_sock = None if reuse_port else bind_socket(host, port, reuse_port=False)
+    # pid -> (slot, start time) for running workers
+    children: Dict[int, Tuple[int, float]] = {}
+    # slot -> time to restart it, and slot -> consecutive quick exits
+    restarts: Dict[int, float] = {}
+    quick_exits: Dict[int, int] = {}
+    stopping = False
+
+    def spawn(slot: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            # uvicorn re-raises the stop signal after shutting down; raising
+            # KeyboardInterrupt (rather than dying) lets the finally below run
+            signal.signal(signal.SIGINT, signal.default_int_handler)
+            signal.signal(signal.SIGTERM, signal.default_int_handler)
+            status = 1
+            try:
+                run_worker(server, host, port, shared_sock, log_level, admission)
+                status = 0
+            except KeyboardInterrupt:
+                status = 0
+            except BaseException:
+                traceback.print_exc()
+            finally:
+                # os._exit skips atexit, where profiles are normally written
+                try:
+                    dump_all_profiles()
+                finally:
+                    os._exit(status)
+        children[pid] = (slot, time.monotonic())
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        restarts.clear()
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    mode = "SO_REUSEPORT" if reuse_port else "shared socket"
+    print(f"🚀 Serving {script_path} on http://{host}:{port}/mcp with {workers} workers ({mode})", file=sys.stderr)
+    for slot in range(workers):
+        spawn(slot)
+
+    failed = False
+    while children or restarts:
+        now = time.monotonic()
+        for slot, due in list(restarts.items()):
+            if due <= now:
+                del restarts[slot]
+                spawn(slot)
+        try:
+            # Poll while restarts are pending so they start on time
+            pid, _ = os.waitpid(-1, os.WNOHANG) if restarts and children else (0, 0)
+            if pid == 0 and restarts:
+                time.sleep(min(0.1, max(0.0, min(restarts.values()) - now)))
+                continue
+            if pid == 0:
+                pid, _ = os.wait()
+        except (ChildProcessError, InterruptedError):
+            continue
+        slot, started = children.pop(pid, (None, 0.0))
+        if slot is None or stopping:
+            continue
+        if time.monotonic() - started < QUICK_EXIT:
+            quick_exits[slot] = quick_exits.get(slot, 0) + 1
+        else:
+            quick_exits[slot] = 1
+        if quick_exits[slot] >= MAX_QUICK_EXITS:
+            print(f"❌ Worker {slot} exited {quick_exits[slot]} times in a row right after starting, stopping",
+                  file=sys.stderr)
+            failed = True
+            stop(signal.SIGTERM, None)
+            continue
+        delay = min(RESTART_DELAY * 2 ** (quick_exits[slot] - 1), MAX_RESTART_DELAY)
+        print(f"⚠️ Worker {slot} (pid {pid}) exited, restarting in {delay:g}s", file=sys.stderr)
+        restarts[slot] = time.monotonic() + delay
+
+    return 1 if failed else 0
+
+
+def rate_limit(rate: float, burst: float) -> Tuple[float, float]:
+    """Check a rate limit given on the command line.
+
+    Raises:
+        ValueError: Unless rate > 0 and burst >= 1.
+    """
+    if not rate > 0:
+        raise ValueError(f"rate must be > 0, got {rate:g}")
+    if not burst >= 1:
+        raise ValueError(f"burst must be >= 1, got {burst:g}")
+    return rate, burst
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a FastMCP server over streamable HTTP with multiple workers.")
+    parser.add_argument("server", help="Path to the server script, e.g. module-1/server.py")
+    parser.add_argument("--host", default=None, help="Interface to bind (defaults to the server's host setting)")
+    parser.add_argument("--port", type=int, default=None, help="Port to bind (defaults to the server's port setting)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Number of worker processes")
+    parser.add_argument("--log-level", default="warning", help="uvicorn log level")
+    parser.add_argument("--max-in-flight", type=int, default=None, help="Requests processed at once per worker (enables admission control)")
+    parser.add_argument("--max-queue", type=int, default=64, help="Requests allowed to wait for a slot per worker")
+    parser.add_argument("--queue-timeout", type=float, default=1.0, help="Longest a request may wait for a slot, in seconds")
+    parser.add_argument("--client-rate", type=float, default=None, help="Tool calls per second allowed per client")
+    parser.add_argument("--client-burst", type=float, default=20, help="Burst size of the per-client limit")
+    parser.add_argument("--tool-rate", action="append", default=[], metavar="NAME=RATE[/BURST]",
+                        help="Tool calls per second allowed for one tool, e.g. book_trip=5/10 (repeatable)")
+    args = parser.parse_args()
+
+    admission = None
+    if args.max_in_flight or args.client_rate is not None or args.tool_rate:
+        tool_rates = {}
+        try:
+            if args.client_rate is not None:
+                rate_limit(args.client_rate, args.client_burst)
+            for spec in args.tool_rate:
+                name, _, limit = spec.partition("=")
+                rate, _, burst = limit.partition("/")
+                # The burst defaults to the rate, but a bucket needs room for one call
+                tool_rates[name] = rate_limit(float(rate), float(burst) if burst else max(1.0, float(rate)))
+        except ValueError as e:
+            parser.error(f"invalid rate limit: {e}")
+        admission = {
+            "max_in_flight": args.max_in_flight or 32,
+            "max_queue": args.max_queue,
+            "queue_timeout": args.queue_timeout,
+            "client_rate": args.client_rate,
+            "client_burst": args.client_burst,
+            "tool_rates": tool_rates,
+        }
+
+    # Imported once; the workers inherit it through fork
+    server = load_server(args.server).mcp
+    default_host, default_port = server_defaults(server)
+    host = args.host or default_host
+    port = args.port or default_port
+
+    if args.workers == 1:
+        run_worker(server, host, port, bind_socket(host, port, reuse_port=False), args.log_level, admission)
+    else:
+        sys.exit(supervise(args.server, server, host, port, args.workers, args.log_level, admission))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,384 @@
+"""Keep large tool results out of the prompt.
+
+Tool results are fed to the LLM verbatim, so one big result (a full
+knowledge base dump, a long booking list) becomes a giant prompt and
+several full copies in client memory. `ToolResultStore` ingests a result's
+content parts one at a time instead of joining them:
+
+- Results up to `max_inline_chars` are returned as they are.
+- Longer results are spilled to a file in a local temp directory as they
+  are read, in batches written off the event loop. The LLM gets a preview
+  (the head and tail of the text, or whatever a custom `summarizer`
+  returns) plus a handle.
+- The model can then call the client-side `read_tool_result` tool with the
+  handle to read a slice by offset, or to jump to the first occurrence of
+  some text.
+
+    store = ToolResultStore.from_env()
+    tools = tools + [store.tool_spec()]
+    ...
+    if name == READ_TOOL_NAME:
+        text = await store.read_tool_call(arguments)
+    else:
+        text, structured = await store.ingest_result(name, await session.call_tool(name, arguments))
+
+The MCP session still receives each result as one message, but the client
+never builds the joined text: it holds one write batch and a bounded
+preview per result. Spill files take at most `max_spill_bytes` in total;
+the oldest are deleted first, and the directory is removed at exit.
+
+Handles are derived from the tool name and a digest of the text, so the
+same result gets the same handle (and the same prompt) on every run, which
+keeps LLM response caching effective.
+
+Configuration (environment):
+
+    MCP_RESULT_MAX_CHARS   longest result sent to the LLM in full (default 8000)
+    MCP_RESULT_SPILL_DIR   where spilled results are kept (default: a new temp directory)
+    MCP_RESULT_SPILL_MB    disk budget for spilled results (default 256)
+"""
+
+import asyncio
+import atexit
+import bisect
+import codecs
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import orjson
+
+READ_TOOL_NAME = "read_tool_result"
+
+# Spilled text is written in pieces of this many characters; each piece
+# start is remembered, so reading at an offset decodes at most one piece
+# before the requested text
+_PIECE_CHARS = 64 * 1024
+
+Summarizer = Callable[[str, str, str, int], str]
+
+
+def head_tail(tool: str, head: str, tail: str, total_chars: int) -> str:
+    """Default preview: the start and end of the text with the omitted length in between."""
+    omitted = total_chars - len(head) - len(tail)
+    return f"{head}\n[... {omitted:,} characters omitted ...]\n{tail}"
+
+
+class _Spill:
+    """A spilled result: its file, length and piece offsets."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.chars = 0
+        self.bytes = 0
+        self.truncated = False
+        # Character offset and byte offset of the start of each written piece
+        self.char_marks: List[int] = []
+        self.byte_marks: List[int] = []
+
+
+class ToolResultStore:
+    """Cap tool results sent to the LLM and keep oversized ones on disk by handle.
+
+    Args:
+        max_inline_chars: Results up to this length are returned in full
+        preview_chars: Characters of an oversized result shown to the LLM (head plus tail)
+        spill_dir: Directory for spilled results (default: a new temp directory)
+        max_spill_bytes: Disk budget for all spilled results; the oldest are deleted first
+        summarizer: `f(tool, head, tail, total_chars) -> str` building the preview
+        batch_bytes: Spilled text is written in batches of about this size
+    """
+
+    def __init__(self, max_inline_chars: int = 8000, preview_chars: Optional[int] = None,
+                 spill_dir: Optional[str] = None, max_spill_bytes: int = 256 * 1024 * 1024,
+                 summarizer: Optional[Summarizer] = None, batch_bytes: int = 1024 * 1024):
+        self.max_inline_chars = max_inline_chars
+        self.preview_chars = min(preview_chars or max_inline_chars, max_inline_chars)
+        self.max_spill_bytes = max_spill_bytes
+        self.summarizer = summarizer or head_tail
+        self.batch_bytes = batch_bytes
+        self.stats = {"results": 0, "spilled": 0, "chars_in": 0, "chars_out": 0}
+        self._owns_dir = spill_dir is None
+        self.spill_dir = spill_dir or tempfile.mkdtemp(prefix="mcp-results-")
+        os.makedirs(self.spill_dir, exist_ok=True)
+        self._spills: "OrderedDict[str, _Spill]" = OrderedDict()
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    @classmethod
+    def from_env(cls, **kwargs: Any) -> "ToolResultStore":
+        """Build a store from the MCP_RESULT_* environment variables."""
+        return cls(
+            max_inline_chars=int(os.getenv("MCP_RESULT_MAX_CHARS", "8000")),
+            spill_dir=os.getenv("MCP_RESULT_SPILL_DIR") or None,
+            max_spill_bytes=int(float(os.getenv("MCP_RESULT_SPILL_MB", "256")) * 1024 * 1024),
+            **kwargs,
+        )
+
+    async def ingest_result(self, tool: str, result: Any) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """Turn an MCP `CallToolResult` into the text for the LLM.
+
+        Returns:
+            Tuple of (text for the LLM, structured result or None). Structured
+            content is sent as compact JSON, like text, subject to the same cap.
+        """
+        structured = getattr(result, "structuredContent", None)
+        if structured is not None:
+            return await self.ingest(tool, [orjson.dumps(structured).decode()]), structured
+
+        content = getattr(result, "content", None)
+        if not content:
+            return await self.ingest(tool, [str(result)]), None
+        if not isinstance(content, list):
+            content = [content]
+        return await self.ingest(tool, (item.text if hasattr(item, "text") else str(item) for item in content)), None
+
+    async def ingest(self, tool: str, parts: Iterable[str]) -> str:
+        """Join `parts` with newlines, spilling to disk once the text outgrows the inline cap.
+
+        Args:
+            tool: Tool that produced the result (used in the handle and preview)
+            parts: Content parts, consumed one at a time
+
+        Returns:
+            The full text, or a preview with a handle for `read_tool_result`.
+        """
+        buffered: List[str] = []
+        buffered_chars = 0
+        spill: Optional[_Spill] = None
+        file = None
+        batch: List[bytes] = []
+        batch_bytes = 0
+        digest = hashlib.blake2b(digest_size=8)
+        head_chars = self.preview_chars - self.preview_chars // 4
+        tail_chars = self.preview_chars // 4
+        head = tail = ""
+
+        async def flush() -> None:
+            nonlocal batch, batch_bytes
+            if batch:
+                data, batch, batch_bytes = b"".join(batch), [], 0
+                await asyncio.to_thread(file.write, data)
+
+        def add(text: str) -> None:
+            nonlocal batch_bytes
+            for start in range(0, len(text), _PIECE_CHARS):
+                piece = text[start:start + _PIECE_CHARS]
+                data = piece.encode("utf-8")
+                digest.update(data)
+                if spill.truncated:
+                    continue
+                room = self.max_spill_bytes - spill.bytes
+                if len(data) > room:
+                    # Store the whole characters that still fit, then stop
+                    piece = data[:room].decode("utf-8", "ignore")
+                    data = piece.encode("utf-8")
+                    spill.truncated = True
+                    if not data:
+                        continue
+                spill.char_marks.append(spill.chars)
+                spill.byte_marks.append(spill.bytes)
+                batch.append(data)
+                batch_bytes += len(data)
+                spill.bytes += len(data)
+                spill.chars += len(piece)
+
+        total = 0
+        try:
+            for i, part in enumerate(parts):
+                text = part if i == 0 else "\n" + part
+                total += len(text)
+                if spill is None:
+                    buffered.append(text)
+                    buffered_chars += len(text)
+                    if buffered_chars <= self.max_inline_chars:
+                        continue
+                    # Too long for the prompt: switch to writing the text out
+                    joined = "".join(buffered)
+                    head = joined[:head_chars]
+                    tail = joined[-tail_chars:] if tail_chars else ""
+                    buffered = []
+                    fd, path = tempfile.mkstemp(dir=self.spill_dir, suffix=".txt")
+                    file = os.fdopen(fd, "wb")
+                    spill = _Spill(path)
+                    text = joined
+                else:
+                    tail = (tail + text[-tail_chars:])[-tail_chars:] if tail_chars else ""
+                add(text)
+                if batch_bytes >= self.batch_bytes:
+                    await flush()
+            if spill is not None:
+                await flush()
+        finally:
+            if file is not None:
+                file.close()
+
+        self.stats["results"] += 1
+        self.stats["chars_in"] += total
+        if spill is None:
+            text = "".join(buffered)
+            self.stats["chars_out"] += len(text)
+            return text
+
+        handle = f"{tool}-{digest.hexdigest()}"
+        self._keep(handle, spill)
+        stored = f"the first {spill.chars:,} characters are" if spill.truncated else "the full text is"
+        preview = self.summarizer(tool, head, tail, total)
+        text = (
+            f"{preview}\n[Result of {tool} truncated: {total:,} characters; {stored} stored as handle "
+            f"\"{handle}\". Call {READ_TOOL_NAME} with this handle and an offset (or a `find` string) to read "
+            f"up to {self.max_inline_chars:,} characters at a time.]"
+        )
+        self.stats["spilled"] += 1
+        self.stats["chars_out"] += len(text)
+        return text
+
+    def _keep(self, handle: str, spill: _Spill) -> None:
+        with self._lock:
+            previous = self._spills.pop(handle, None)
+            if previous is not None:
+                os.remove(previous.path)
+            path = os.path.join(self.spill_dir, f"{handle}.txt")
+            os.replace(spill.path, path)
+            spill.path = path
+            self._spills[handle] = spill
+            # Stay within the disk budget, always keeping the newest result
+            used = sum(s.bytes for s in self._spills.values())
+            while used > self.max_spill_bytes and len(self._spills) > 1:
+                _, oldest = self._spills.popitem(last=False)
+                used -= oldest.bytes
+                os.remove(oldest.path)
+
+    def read(self, handle: str, offset: int = 0, length: Optional[int] = None, find: Optional[str] = None) -> str:
+        """Read a slice of a spilled result.
+
+        Args:
+            handle: Handle from a truncated result
+            offset: Character offset to start at
+            length: Characters to return (capped at `max_inline_chars`)
+            find: Start at the first occurrence of this text at or after `offset` instead
+
+        Returns:
+            The slice with a header giving its position, or an error message.
+        """
+        with self._lock:
+            spill = self._spills.get(handle)
+        if spill is None:
+            return f"Error: unknown or expired result handle {handle!r}"
+        length = max(1, min(length or self.max_inline_chars, self.max_inline_chars))
+        offset = max(0, offset)
+        if offset >= spill.chars:
+            return f"[{handle}: offset {offset:,} is past the end ({spill.chars:,} characters stored)]"
+
+        if find:
+            found = self._find(spill, find, offset)
+            if found is None:
+                return f"[{handle}: {find!r} not found after offset {offset:,}]"
+            offset = found
+
+        text = "".join(self._iter_text(spill, offset, length))
+        end = offset + len(text)
+        after = f"next offset {end:,}" if end < spill.chars else "end of result"
+        return f"[{handle}: characters {offset:,}-{end:,} of {spill.chars:,}; {after}]\n{text}"
+
+    def _iter_text(self, spill: _Spill, offset: int, limit: Optional[int] = None) -> Iterable[str]:
+        """Yield the stored text from character `offset`, up to `limit` characters."""
+        piece = bisect.bisect_right(spill.char_marks, offset) - 1
+        skip = offset - spill.char_marks[piece]
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        remaining = limit
+        with open(spill.path, "rb") as f:
+            f.seek(spill.byte_marks[piece])
+            while remaining is None or remaining > 0:
+                data = f.read(_PIECE_CHARS)
+                if not data:
+                    break
+                text = decoder.decode(data)
+                if skip:
+                    dropped = min(skip, len(text))
+                    text, skip = text[dropped:], skip - dropped
+                if remaining is not None:
+                    text = text[:remaining]
+                    remaining -= len(text)
+                if text:
+                    yield text
+
+    def _find(self, spill: _Spill, needle: str, offset: int) -> Optional[int]:
+        carry = ""
+        position = offset  # character offset of the start of `carry`
+        for text in self._iter_text(spill, offset):
+            window = carry + text
+            index = window.find(needle)
+            if index >= 0:
+                return position + index
+            keep = min(len(needle) - 1, len(window))
+            position += len(window) - keep
+            carry = window[len(window) - keep:] if keep else ""
+        return None
+
+    async def read_tool_call(self, arguments: Dict[str, Any]) -> str:
+        """Answer a `read_tool_result` call from the LLM.
+
+        Malformed arguments produce an error message for the model rather
+        than an exception, so one bad call doesn't end the turn.
+        """
+        try:
+            offset = int(arguments.get("offset") or 0)
+            length = arguments.get("length")
+            length = None if length is None else int(length)
+        except (TypeError, ValueError):
+            return f"Error: offset and length must be integers (got offset={arguments.get('offset')!r}, length={arguments.get('length')!r})"
+        find = arguments.get("find")
+        return await asyncio.to_thread(
+            self.read,
+            str(arguments.get("handle", "")),
+            offset,
+            length,
+            None if find is None else str(find),
+        )
+
+    def tool_spec(self) -> Dict[str, Any]:
+        """OpenAI definition of the client-side `read_tool_result` tool."""
+        return {
+            "type": "function",
+            "function": {
+                "name": READ_TOOL_NAME,
+                "description": (
+                    "Read part of a tool result that was too long to show in full. Use the handle given in "
+                    f"the truncated result. Returns up to {self.max_inline_chars} characters per call."
+                ),
+                "parameters": {
+                    "properties": {
+                        "find": {"description": "Start at the first occurrence of this text at or after offset", "type": "string"},
+                        "handle": {"description": "Handle from the truncated result", "type": "string"},
+                        "length": {"description": "Number of characters to read", "type": "integer"},
+                        "offset": {"description": "Character offset to start reading at", "type": "integer"},
+                    },
+                    "required": ["handle"],
+                    "type": "object",
+                },
+            },
+        }
+
+    def report(self) -> str:
+        s = self.stats
+        return (
+            f"Tool results: {s['results']} ({s['spilled']} spilled to disk), "
+            f"{s['chars_in']:,} characters received, {s['chars_out']:,} sent to the LLM"
+        )
+
+    def close(self) -> None:
+        """Delete spilled results (and the temp directory if the store created it)."""
+        with self._lock:
+            for spill in self._spills.values():
+                try:
+                    os.remove(spill.path)
+                except FileNotFoundError:
+                    pass
+            self._spills.clear()
+        if self._owns_dir:
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
@@ -0,0 +1,91 @@
+"""Record the MCP tool calls a client makes as a JSONL trace.
+
+Each line describes one `call_tool`:
+
+    {"ts": 1735725600.123, "server": null, "tool": "book_trip", "arguments": {...},
+     "duration_ms": 4.2, "result_bytes": 311, "is_error": false, "error": null}
+
+`ts` is the wall-clock start time, so `common/replay.py` can fire the same
+calls at a server with the original spacing (or faster) and no LLM in the loop.
+
+Clients record when MCP_TRACE_FILE is set:
+
+    recorder = TraceRecorder.from_env()
+    result = await recorder.call_tool(session, "book_trip", arguments)
+"""
+
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import orjson
+
+
+class TraceRecorder:
+    """Append one JSON line per tool call to `path`.
+
+    Args:
+        path: Trace file; appended to if it exists
+        server: Name of the server the calls go to, stored with each record
+    """
+
+    def __init__(self, path: str, server: Optional[str] = None):
+        self.path = path
+        self.server = server
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "ab")
+
+    @classmethod
+    def from_env(cls, server: Optional[str] = None) -> Optional["TraceRecorder"]:
+        """Return a recorder writing to $MCP_TRACE_FILE, or None if it is unset."""
+        path = os.getenv("MCP_TRACE_FILE")
+        return cls(path, server) if path else None
+
+    def record(self, tool: str, arguments: Dict[str, Any], started: float, duration: float,
+               result_bytes: int, is_error: bool, error: Optional[str] = None) -> None:
+        line = orjson.dumps({
+            "ts": started,
+            "server": self.server,
+            "tool": tool,
+            "arguments": arguments,
+            "duration_ms": round(duration * 1000, 3),
+            "result_bytes": result_bytes,
+            "is_error": is_error,
+            "error": error,
+        }) + b"\n"
+        # One write per line so concurrent calls never interleave records
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    async def call_tool(self, target: Any, name: str, arguments: Dict[str, Any], **kwargs: Any) -> Any:
+        """Call `target.call_tool(name, arguments)` and record the call.
+
+        Args:
+            target: Anything with an MCP-style `call_tool` (a ClientSession,
+                MCPConnectionPool or MCPGateway)
+            name: Tool name
+            arguments: Tool arguments
+            **kwargs: Passed through to `target.call_tool`
+
+        Returns:
+            The tool result. Exceptions are recorded and re-raised.
+        """
+        started = time.time()
+        start = time.perf_counter()
+        try:
+            result = await target.call_tool(name, arguments, **kwargs)
+        except Exception as e:
+            self.record(name, arguments, started, time.perf_counter() - start, 0, True, f"{type(e).__name__}: {e}")
+            raise
+        duration = time.perf_counter() - start
+        self.record(name, arguments, started, duration, len(result.model_dump_json(exclude_none=True)),
+                    bool(result.isError))
+        return result
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
@@ -0,0 +1,177 @@
+"""Pre-forked pool of warm stdio MCP servers.
+
+Spawning a stdio server normally pays for interpreter start plus importing
+`mcp`/`fastmcp` and pydantic, which takes most of a second. The pool imports
+a server script once, then keeps a few idle forked children waiting on a
+Unix socket. Each connection is handed to an already-warm child, which runs
+the server over the connection as if it were its stdin/stdout.
+
+Start a pool (from the repository root):
+
+    python -m common.warm_pool serve module-1/server.py --socket /tmp/kb.sock
+
+Attach to it anywhere a client would spawn the server. The attach side only
+imports the standard library, so it starts in a few milliseconds:
+
+    server_params = StdioServerParameters(
+        command="python",
+        args=["/path/to/common/warm_pool.py", "attach", "/tmp/kb.sock"],
+    )
+"""
+
+import argparse
+import os
+import select
+import signal
+import socket
+import sys
+import threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def attach(socket_path: str) -> None:
+    """Relay this process's stdin/stdout to a pooled server.
+
+    Args:
+        socket_path: Path of the pool's Unix socket
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(socket_path)
+
+    def pump_stdin():
+        while True:
+            data = os.read(0, 65536)
+            if not data:
+                # Closing our write side makes the server see EOF and exit
+                sock.shutdown(socket.SHUT_WR)
+                return
+            sock.sendall(data)
+
+    threading.Thread(target=pump_stdin, daemon=True).start()
+
+    while True:
+        data = sock.recv(65536)
+        if not data:
+            break
+        view = memoryview(data)
+        while view:
+            view = view[os.write(1, view):]
+
+
+def _spawn_idle(listener: socket.socket, server, ready_w: int) -> int:
+    """Fork a child that waits for one connection and serves it over stdio.
+
+    Returns:
+        The child's pid (in the parent).
+    """
+    pid = os.fork()
+    if pid:
+        return pid
+
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    try:
+        conn, _ = listener.accept()
+        listener.close()
+        # Tell the pool to fork a replacement while we serve this client
+        os.write(ready_w, b"x")
+
+        os.dup2(conn.fileno(), 0)
+        os.dup2(conn.fileno(), 1)
+        conn.close()
+        server.run(transport="stdio")
+    finally:
+        # os._exit skips atexit, where profiles are normally written
+        try:
+            from common.profiling import dump_all_profiles
+
+            dump_all_profiles()
+        finally:
+            os._exit(0)
+
+
+def _reap(children: set) -> None:
+    """Collect exited children without blocking and drop them from `children`.
+
+    A pid stays in `children` until it is reaped here, so it cannot have been
+    reused by an unrelated process while it is in the set.
+    """
+    while children:
+        try:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            children.clear()
+            return
+        if not pid:
+            return
+        children.discard(pid)
+
+
+def serve(script_path: str, socket_path: str, size: int) -> None:
+    """Import a server once and keep `size` idle children ready to serve.
+
+    Args:
+        script_path: Path to the server script
+        socket_path: Path of the Unix socket to listen on
+        size: Number of idle children kept ready
+    """
+    sys.path.insert(0, ROOT)
+    from common.serve_http import load_server
+
+    server = load_server(script_path).mcp
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    listener.listen(128)
+
+    # SIGTERM shuts down like Ctrl+C
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    ready_r, ready_w = os.pipe()
+    # Live children, idle or serving a client
+    children = {_spawn_idle(listener, server, ready_w) for _ in range(size)}
+    print(f"🔥 Warm pool for {script_path} listening on {socket_path} ({size} idle servers)", file=sys.stderr)
+
+    try:
+        while True:
+            readable, _, _ = select.select([ready_r], [], [], 1.0)
+            if readable:
+                for _ in os.read(ready_r, size):
+                    children.add(_spawn_idle(listener, server, ready_w))
+            _reap(children)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        _reap(children)
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        listener.close()
+        os.unlink(socket_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-forked pool of warm stdio MCP servers.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = subparsers.add_parser("serve", help="Start a pool for a server script")
+    serve_parser.add_argument("server", help="Path to the server script, e.g. module-1/server.py")
+    serve_parser.add_argument("--socket", required=True, help="Unix socket path to listen on")
+    serve_parser.add_argument("--size", type=int, default=2, help="Number of idle servers kept ready")
+
+    attach_parser = subparsers.add_parser("attach", help="Connect stdin/stdout to a pooled server")
+    attach_parser.add_argument("socket", help="Unix socket path of the pool")
+
+    args = parser.parse_args()
+    if args.command == "serve":
+        serve(args.server, args.socket, args.size)
+    else:
+        attach(args.socket)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,12 +9,16 @@ from fastmcp import Client
 # python server.py
 #
 # Then, you can run this client to interact with the server.
+#
+# The client is reentrant: main() keeps one connection open so both
+# operations share a single server process instead of spawning one each.
+client = Client("server.py")
 
 async def list_tools():
     """
     Lists all available tools from the server.
     """
-    async with Client("server.py") as client:
+    async with client:
         tools = await client.list_tools()
         print("Available tools:")
         for t in tools:
@@ -25,7 +29,7 @@ async def call_weather_tool(latitude: float, longitude: float):
     """
     Calls the weather tool on the server with the given coordinates.
     """
-    async with Client("server.py") as client:
+    async with client:
         # You could deduce the arguments by retrieveing inputSchema from the tool
         result = await client.call_tool("get_weather", {
             "latitude": latitude, 
@@ -38,12 +42,13 @@ async def main():
     """
     Main function that demonstrates listing tools and calling the weather tool.
     """
-    # List available tools
-    await list_tools()
-    
-    # Call the weather tool with example coordinates (New York City)
-    print("\nCalling weather tool for New York City (40.7128, -74.0060):")
-    await call_weather_tool(40.7128, -74.0060)
+    async with client:
+        # List available tools
+        await list_tools()
+        
+        # Call the weather tool with example coordinates (New York City)
+        print("\nCalling weather tool for New York City (40.7128, -74.0060):")
+        await call_weather_tool(40.7128, -74.0060)
 
 if __name__ == "__main__":
     asyncio.run(main()) 
\ No newline at end of file
@@ -1,11 +1,33 @@
-from fastmcp import FastMCP
-import requests
+import os
+import sys
+from fastmcp import Context, FastMCP
 from typing import Dict, Any
 
+# Make the repo-level `common` package importable when run from this folder
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))
+from common.resilience import CircuitBreaker, StaleCache, call_upstream, deadline, request_timeout
+
 mcp = FastMCP("Weather MCP Server")
 
+OPEN_METEO_URL = os.getenv("OPEN_METEO_URL", "https://api.open-meteo.com/v1/forecast")
+
+# Fail fast while Open-Meteo is down and fall back to the last known weather
+open_meteo_breaker = CircuitBreaker("open-meteo", failure_threshold=5, reset_timeout=30.0)
+weather_cache = StaleCache(max_age=3600.0)
+
+# Shared so calls reuse connections instead of setting up a client (and TLS) each time
+_http_client = None
+
+def http_client():
+    """Return the server's shared httpx.AsyncClient, creating it on first use."""
+    global _http_client
+    if _http_client is None:
+        import httpx
+        _http_client = httpx.AsyncClient()
+    return _http_client
+
 @mcp.tool
-def get_weather(latitude: float, longitude: float) -> Dict[str, Any]:
+async def get_weather(latitude: float, longitude: float, ctx: Context) -> Dict[str, Any]:
     """
     Gets current weather information for the given coordinates using Open-Meteo API.
     
@@ -16,22 +38,41 @@ def get_weather(latitude: float, longitude: float) -> Dict[str, Any]:
     Returns:
         Dictionary containing weather information
     """
-    try:
-        url = f"https://api.open-meteo.com/v1/forecast"
-        params = {
-            "latitude": latitude,
-            "longitude": longitude,
-            "current": "temperature_2m,relative_humidity_2m,wind_speed_10m,weather_code",
-            "timezone": "auto"
-        }
-        
-        response = requests.get(url, params=params)
+    # Imported here so server startup doesn't pay for it
+    import httpx
+
+    params = {
+        "latitude": latitude,
+        "longitude": longitude,
+        "current": "temperature_2m,relative_humidity_2m,wind_speed_10m,weather_code",
+        "timezone": "auto"
+    }
+
+    # Async so a slow upstream never blocks the event loop serving other requests
+    async def fetch(timeout: float) -> Dict[str, Any]:
+        response = await http_client().get(OPEN_METEO_URL, params=params, timeout=timeout)
         response.raise_for_status()
-        
-        data = response.json()
+        return response.json()
+
+    def retryable(error: Exception) -> bool:
+        # Client errors (bad coordinates) won't succeed on retry; 429 and 5xx may
+        if isinstance(error, httpx.HTTPStatusError):
+            return error.response.status_code == 429 or error.response.status_code >= 500
+        return True
+
+    try:
+        # Honor the client's time budget if it sent one in the request metadata
+        with deadline(request_timeout(ctx, default=10.0)):
+            data, stale = await call_upstream(
+                fetch,
+                breaker=open_meteo_breaker,
+                cache=weather_cache,
+                cache_key=(latitude, longitude),
+                retryable=retryable,
+            )
         current = data.get("current", {})
         
-        return {
+        result = {
             "location": f"{latitude}, {longitude}",
             "temperature": current.get("temperature_2m"),
             "humidity": current.get("relative_humidity_2m"),
@@ -40,6 +81,9 @@ def get_weather(latitude: float, longitude: float) -> Dict[str, Any]:
             "time": current.get("time"),
             "units": data.get("current_units", {})
         }
+        if stale:
+            result["stale"] = True
+        return result
     except Exception as e:
         return {"error": f"Failed to fetch weather data: {str(e)}"}
 
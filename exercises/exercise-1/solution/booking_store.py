@@ -0,0 +1,60 @@
+import os
+import threading
+from typing import Any, Dict
+
+import orjson
+
+# The repo-level common package; travel_server.py puts it on sys.path
+from common.atomic_files import atomic_write
+
+
+class BookingStore:
+    """File-backed store for trip and transportation bookings.
+
+    Every write goes through `commit`, which serializes the document to a
+    temporary file in the bookings directory and atomically renames it into
+    place, keeping the file's usual permissions. A booking document is
+    therefore either fully written or not written at all, which lets a whole
+    group or itinerary be committed as a single transaction. Documents are written as compact JSON (no
+    indentation), which keeps large group files small and fast to encode.
+
+    The store is the only state the travel server shares between requests.
+    Because each write is a rename of a private temporary file, several
+    server processes (see common/serve_http.py) can share one bookings
+    directory safely; concurrent writes to the same document are
+    last-writer-wins.
+    """
+
+    def __init__(self, bookings_dir: str):
+        self.bookings_dir = bookings_dir
+        self._lock = threading.Lock()
+
+    def commit(self, filename: str, data: Dict[str, Any]) -> str:
+        """Atomically write a booking document.
+
+        Args:
+            filename: File name of the document inside the bookings directory
+            data: The JSON-serializable booking document (plain dicts and lists)
+
+        Returns:
+            The full path of the written document.
+        """
+        os.makedirs(self.bookings_dir, exist_ok=True)
+        path = os.path.join(self.bookings_dir, filename)
+
+        with self._lock:
+            atomic_write(path, orjson.dumps(data))
+
+        return path
+
+    def load(self, filename: str) -> Dict[str, Any]:
+        """Load a booking document.
+
+        Args:
+            filename: File name of the document inside the bookings directory
+
+        Returns:
+            The parsed booking document.
+        """
+        with open(os.path.join(self.bookings_dir, filename), 'rb') as f:
+            return orjson.loads(f.read())
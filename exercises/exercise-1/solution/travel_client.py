@@ -1,17 +1,87 @@
 import asyncio
 import json
 import os
+import sys
+import time
 from typing import List, Dict, Any, Tuple, Optional
 from openai import OpenAI
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
 from dotenv import load_dotenv
+
+# Make the repo-level `common` package importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))
+from common.gateway import MCPGateway
+from common.llm_cache import LLMResponseCache
+from common.prompt_prefix import PromptCacheStats, canonical_tools
+from common.tool_results import READ_TOOL_NAME, ToolResultStore
+from common.tracing import TraceRecorder
+
 # Load environment variables
 load_dotenv("../../.env")
 
 # Initialize OpenAI client
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
+# OpenAI only caches prompt prefixes automatically for gpt-4o and newer models
+# (and prompts of at least 1024 tokens); with gpt-4 cached_tokens is always 0
+MODEL = "gpt-4o"
+
+# Cache identical LLM requests; set LLM_CACHE_DIR to keep the cache across runs.
+# Turns that book something or edit the knowledge base (exposed through
+# --gateway) are never served from the cache.
+llm_cache = LLMResponseCache(
+    disk_dir=os.getenv("LLM_CACHE_DIR"),
+    mutating_tools={
+        "book_trip", "book_transportation", "book_trips_bulk", "book_itinerary",
+        "add_kb_entry", "update_kb_entry", "delete_kb_entry",
+    },
+)
+
+# Cached-token counts reported by the API, to check that prompt prefixes stay stable
+prompt_cache = PromptCacheStats()
+
+# Set MCP_TRACE_FILE to record every tool call for replay with common/replay.py
+trace_recorder = TraceRecorder.from_env()
+
+# Long tool results are spilled to disk and sent to the LLM as a preview plus
+# a handle it can read with read_tool_result; see common/tool_results.py
+result_store = ToolResultStore.from_env()
+
+# Rounds of follow-up tool calls allowed after a result was truncated
+MAX_RESULT_READ_ROUNDS = 3
+
+# Kept byte-identical across turns and runs so the provider can cache the prompt prefix
+SYSTEM_PROMPT = """You are a helpful travel booking assistant. You can help users with:
+1. Getting travel recommendations based on destination, budget, and duration
+2. Booking trips with traveler details and dates
+3. Booking transportation linked to existing trip bookings
+4. Booking trips for a whole group at once (book_trips_bulk) and booking a trip together with its transportation legs (book_itinerary)
+
+Prefer the bulk and itinerary tools over many individual booking calls.
+
+Always be helpful and ask for clarification if needed. When booking trips, generate reasonable booking IDs if not provided.
+You have access to the user's conversation history, so you can reference previous bookings and recommendations.
+"""
+
+def create_completion(**request: Any):
+    """Send a chat completion request through the response cache.
+    
+    Records prompt-cache usage for requests that actually reached the API.
+    
+    Args:
+        **request: Arguments for `chat.completions.create`
+        
+    Returns:
+        The chat completion.
+    """
+    hits = llm_cache.stats["hits"]
+    start = time.perf_counter()
+    response = llm_cache.create(client, **request)
+    if llm_cache.stats["hits"] == hits:
+        prompt_cache.record(response.usage, time.perf_counter() - start)
+    return response
+
 async def get_mcp_tools(session: ClientSession) -> List[Dict[str, Any]]:
     """Get available tools from the MCP server in OpenAI format.
     
@@ -19,26 +89,19 @@ async def get_mcp_tools(session: ClientSession) -> List[Dict[str, Any]]:
         session: Active MCP ClientSession
         
     Returns:
-        A list of tools in OpenAI format.
+        A list of tools in OpenAI format, sorted by name with canonical
+        schemas so the request prefix is identical every time. Includes the
+        client-side read_tool_result tool.
     """
     print("📋 Fetching available tools from MCP server...")
     
     tools_result = await session.list_tools()
-    tools = [
-        {
-            "type": "function",
-            "function": {
-                "name": tool.name,
-                "description": tool.description,
-                "parameters": tool.inputSchema,
-            },
-        }
-        for tool in tools_result.tools
-    ]
+    tools = canonical_tools(tools_result.tools) + [result_store.tool_spec()]
+    tools.sort(key=lambda tool: tool["function"]["name"])
     print(f"📋 Discovered {len(tools)} tools: {', '.join([t['function']['name'] for t in tools])}")
     return tools
 
-async def call_mcp_tool(session: ClientSession, function_name: str, function_args: Dict[str, Any]) -> str:
+async def call_mcp_tool(session: ClientSession, function_name: str, function_args: Dict[str, Any]) -> Tuple[str, Optional[Dict[str, Any]]]:
     """Call an MCP tool with the given arguments.
     
     Args:
@@ -47,43 +110,68 @@ async def call_mcp_tool(session: ClientSession, function_name: str, function_arg
         function_args: Arguments to pass to the tool
         
     Returns:
-        The result of the tool call as a string.
+        Tuple of (result for the LLM, structured result or None). Tools that
+        return structured content are forwarded to the LLM as compact JSON.
+        Results longer than MCP_RESULT_MAX_CHARS are replaced by a preview
+        and a handle for read_tool_result.
     """
-    result = await session.call_tool(function_name, function_args)
-    
-    # Extract text content from the result
-    if hasattr(result, 'content') and result.content:
-        # Handle list of content objects
-        if isinstance(result.content, list):
-            content_parts = []
-            for content_item in result.content:
-                if hasattr(content_item, 'text'):
-                    content_parts.append(content_item.text)
-                else:
-                    content_parts.append(str(content_item))
-            return '\n'.join(content_parts)
-        # Handle single content object
-        elif hasattr(result.content, 'text'):
-            return result.content.text
-        else:
-            return str(result.content)
+    # Served from the local result store, not the MCP server
+    if function_name == READ_TOOL_NAME:
+        return await result_store.read_tool_call(function_args), None
+    
+    if trace_recorder is not None:
+        result = await trace_recorder.call_tool(session, function_name, function_args)
     else:
-        return str(result)
+        result = await session.call_tool(function_name, function_args)
+    
+    # Content parts are consumed one at a time and never joined in full
+    return await result_store.ingest_result(function_name, result)
+
+def render_tool_result(data: Dict[str, Any], indent: str = "   ") -> str:
+    """Render a structured tool result as readable lines for the console.
+    
+    Args:
+        data: Structured content returned by a tool
+        indent: Prefix for each rendered line
+        
+    Returns:
+        A human-readable multi-line string.
+    """
+    lines = []
+    for key, value in data.items():
+        label = key.replace('_', ' ').capitalize()
+        if isinstance(value, list):
+            if not value:
+                continue
+            lines.append(f"{indent}{label}:")
+            for item in value:
+                if isinstance(item, dict):
+                    lines.append(f"{indent}  - " + ", ".join(f"{k}={v}" for k, v in item.items() if v is not None))
+                else:
+                    lines.append(f"{indent}  - {item}")
+        elif isinstance(value, dict):
+            lines.append(f"{indent}{label}:")
+            lines.append(render_tool_result(value, indent + "  "))
+        elif value is not None:
+            lines.append(f"{indent}{label}: {value}")
+    return '\n'.join(lines)
 
-async def process_user_query(user_input: str, conversation_history: List[Dict[str, Any]], session: ClientSession) -> Tuple[str, List[Dict[str, Any]]]:
+async def process_user_query(user_input: str, conversation_history: List[Dict[str, Any]], session: ClientSession, tools: Optional[List[Dict[str, Any]]] = None) -> Tuple[str, List[Dict[str, Any]]]:
     """Process user input with OpenAI and handle any tool calls.
     
     Args:
         user_input: The user's input message
         conversation_history: Previous conversation messages
         session: Active MCP ClientSession
+        tools: Tools in OpenAI format; fetched from the MCP server if not given
         
     Returns:
         Tuple of (assistant_response, updated_conversation_history)
     """
     
     # Get available tools dynamically from MCP server
-    tools = await get_mcp_tools(session)
+    if tools is None:
+        tools = await get_mcp_tools(session)
     
     # Add user input to conversation history
     print("📝 Adding user message to conversation history")
@@ -98,8 +186,8 @@ async def process_user_query(user_input: str, conversation_history: List[Dict[st
     
     # Make initial request to OpenAI
     print("🤖 Sending request to OpenAI GPT-4...")
-    response = client.chat.completions.create(
-        model="gpt-4",
+    response = create_completion(
+        model=MODEL,
         messages=messages,
         tools=tools,
         tool_choice="auto"
@@ -110,50 +198,80 @@ async def process_user_query(user_input: str, conversation_history: List[Dict[st
     
     # Handle tool calls if any
     if message.tool_calls:
-        print(f"🔧 OpenAI wants to call {len(message.tool_calls)} tool(s): {[tc.function.name for tc in message.tool_calls]}")
-        
-        # Add assistant message to conversation
-        messages.append({
-            "role": "assistant",
-            "content": message.content,
-            "tool_calls": [
-                {
-                    "id": tool_call.id,
-                    "type": "function",
-                    "function": {
-                        "name": tool_call.function.name,
-                        "arguments": tool_call.function.arguments
-                    }
-                }
-                for tool_call in message.tool_calls
-            ]
-        })
-        
-        # Execute each tool call
-        for i, tool_call in enumerate(message.tool_calls, 1):
-            function_name = tool_call.function.name
-            function_args = json.loads(tool_call.function.arguments)
-            
-            print(f"🔄 Executing tool {i}/{len(message.tool_calls)}: {function_name}")
+        read_rounds = 0
+        while True:
+            print(f"🔧 OpenAI wants to call {len(message.tool_calls)} tool(s): {[tc.function.name for tc in message.tool_calls]}")
             
-            # Call the MCP tool
-            tool_result = await call_mcp_tool(session, function_name, function_args)
-            
-            # Add tool result to messages
+            # Add assistant message to conversation
             messages.append({
-                "role": "tool",
-                "tool_call_id": tool_call.id,
-                "content": tool_result
+                "role": "assistant",
+                "content": message.content,
+                "tool_calls": [
+                    {
+                        "id": tool_call.id,
+                        "type": "function",
+                        "function": {
+                            "name": tool_call.function.name,
+                            "arguments": tool_call.function.arguments
+                        }
+                    }
+                    for tool_call in message.tool_calls
+                ]
             })
+            
+            # Execute each tool call
+            spilled = result_store.stats["spilled"]
+            for i, tool_call in enumerate(message.tool_calls, 1):
+                function_name = tool_call.function.name
+                function_args = json.loads(tool_call.function.arguments)
+                
+                print(f"🔄 Executing tool {i}/{len(message.tool_calls)}: {function_name}")
+                
+                # Call the MCP tool
+                tool_result, structured = await call_mcp_tool(session, function_name, function_args)
+                if structured is not None:
+                    print(render_tool_result(structured))
+                
+                # Add tool result to messages
+                messages.append({
+                    "role": "tool",
+                    "tool_call_id": tool_call.id,
+                    "content": tool_result
+                })
+            
+            # A truncated result (or a slice of one) may need reading further
+            # before the model can answer
+            reading = result_store.stats["spilled"] > spilled or any(
+                tc.function.name == READ_TOOL_NAME for tc in message.tool_calls
+            )
+            if not reading or read_rounds >= MAX_RESULT_READ_ROUNDS:
+                break
+            read_rounds += 1
+            print("📄 Tool result was truncated; letting OpenAI read more of it...")
+            response = create_completion(
+                model=MODEL,
+                messages=messages,
+                tools=tools,
+                tool_choice="auto"
+            )
+            message = response.choices[0].message
+            if not message.tool_calls:
+                break
         
-        print("🤖 Sending tool results back to OpenAI for final response...")
-        # Get final response from OpenAI
-        final_response = client.chat.completions.create(
-            model="gpt-4",
-            messages=messages
-        )
-        
-        assistant_response = final_response.choices[0].message.content
+        if message.tool_calls:
+            print("🤖 Sending tool results back to OpenAI for final response...")
+            # Get final response from OpenAI. Sending the same tools keeps the
+            # prompt prefix identical to the first request; "none" stops more calls.
+            final_response = create_completion(
+                model=MODEL,
+                messages=messages,
+                tools=tools,
+                tool_choice="none"
+            )
+            assistant_response = final_response.choices[0].message.content
+        else:
+            # The model answered after reading what it needed
+            assistant_response = message.content
         
         # Add final assistant response to conversation history
         print("💾 Updating conversation history with tool calls and final response")
@@ -186,17 +304,13 @@ async def run_chat_loop(session: ClientSession):
     conversation_history = [
         {
             "role": "system",
-            "content": """You are a helpful travel booking assistant. You can help users with:
-            1. Getting travel recommendations based on destination, budget, and duration
-            2. Booking trips with traveler details and dates
-            3. Booking transportation linked to existing trip bookings
-            
-            Always be helpful and ask for clarification if needed. When booking trips, generate reasonable booking IDs if not provided.
-            You have access to the user's conversation history, so you can reference previous bookings and recommendations.
-            """
+            "content": SYSTEM_PROMPT
         }
     ]
     
+    # The tool list doesn't change during a session; fetch it once
+    tools = await get_mcp_tools(session)
+    
     print("="*100)
     
     while True:
@@ -204,6 +318,9 @@ async def run_chat_loop(session: ClientSession):
             user_input = input("\nYou: ").strip()
             
             if user_input.lower() in ['quit', 'exit', 'bye']:
+                print(f"📊 {llm_cache.report()}")
+                print(f"📊 {prompt_cache.report()}")
+                print(f"📊 {result_store.report()}")
                 print("👋 Goodbye! Have a great trip! ✈️")
                 break
                 
@@ -212,25 +329,47 @@ async def run_chat_loop(session: ClientSession):
                 
             print(f"\n🔄 Processing your request: '{user_input}'")
             print("-" * 100)
-            response, conversation_history = await process_user_query(user_input, conversation_history, session)
+            response, conversation_history = await process_user_query(user_input, conversation_history, session, tools)
             print("-" * 100)
             print(f"\nAssistant: {response}")
             print("="*100)
             
         except KeyboardInterrupt:
-            print("\n👋 Goodbye! Have a great trip! ✈️")
+            print(f"\n📊 {llm_cache.report()}")
+            print(f"📊 {prompt_cache.report()}")
+            print(f"📊 {result_store.report()}")
+            print("👋 Goodbye! Have a great trip! ✈️")
             break
         except Exception as e:
             print(f"❌ Error occurred: {e}")
             print("🔄 Please try again or type 'quit' to exit")
 
-async def main():
-    """Main function that sets up MCP connection and runs the chat loop."""
+async def main(use_gateway: bool = False):
+    """Main function that sets up MCP connection and runs the chat loop.
+    
+    Args:
+        use_gateway: Connect to all workshop servers (knowledge base, weather
+            and travel) through one gateway instead of only travel_server.py
+    """
     print("🌍 Travel Booking Assistant")
     print("Ask me anything about travel recommendations, booking trips, or transportation!")
     print("Type 'quit' to exit.\n")
     
     print("🚀 Initializing travel assistant...")
+    
+    if use_gateway:
+        print("🔧 Connecting to all MCP servers through the gateway...")
+        gateway = MCPGateway()
+        try:
+            await gateway.start()
+            print(f"✅ Connected to MCP servers: {', '.join(gateway.servers)}")
+            # The gateway has the same list_tools/call_tool interface as a session
+            await run_chat_loop(gateway)
+        finally:
+            await gateway.close()
+        print("🧹 MCP server connections closed")
+        return
+    
     print("🔧 Setting up MCP server connection...")
     
     # Set up MCP server parameters
@@ -251,4 +390,4 @@ async def main():
     print("🧹 MCP server connection closed")
 
 if __name__ == "__main__":
-    asyncio.run(main()) 
\ No newline at end of file
+    asyncio.run(main(use_gateway="--gateway" in sys.argv[1:])) 
\ No newline at end of file
@@ -1,17 +1,180 @@
 import os
-import json
+import sys
+import uuid
 from datetime import datetime
+from typing import Annotated, List, Dict, Any, Optional
+
+import orjson
+from typing_extensions import TypedDict
 from mcp.server.fastmcp import FastMCP
+from mcp.types import CallToolResult, TextContent
+
+# Make the repo-level `common` package importable when run from this folder
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))
+from booking_store import BookingStore
+from common.profiling import ToolProfiler
 
 # Create an MCP server
 mcp = FastMCP(
     name="Travel Booking Server",
-    host="0.0.0.0",  # only used for SSE transport (localhost)
-    port=8051,  # only used for SSE transport (set this to any port)
+    host="0.0.0.0",  # only used for SSE/HTTP transports (localhost)
+    port=8051,  # only used for SSE/HTTP transports (set this to any port)
+    stateless_http=True,  # no per-client session state, so any worker can serve any request
 )
 
+# All booking documents are written through a single store
+store = BookingStore(os.path.join(os.path.dirname(__file__), "bookings"))
+
+# Off unless MCP_PROFILE_RATE is set; see common/profiling.py
+profiler = ToolProfiler.for_server(mcp)
+
+
+# Output schemas advertised to clients for each tool's structured content
+class TripRecommendation(TypedDict):
+    destination: str
+    budget: int
+    duration_days: int
+    budget_tier: str
+    activities: Optional[str]
+
+
+class TripBooking(TypedDict):
+    booking_id: str
+    traveler_name: str
+    destination: str
+    start_date: str
+    end_date: str
+    budget: int
+    booking_date: str
+    status: str
+    saved_to: str
+
+
+class TransportBooking(TypedDict):
+    transport_booking_id: str
+    trip_booking_id: str
+    transport_type: str
+    departure: str
+    arrival: str
+    departure_time: str
+    booking_date: str
+    status: str
+    saved_to: str
+
+
+class BulkBookingItem(TypedDict):
+    index: int
+    status: str
+    booking_id: Optional[str]
+    error: Optional[str]
+
+
+class BulkBookingResult(TypedDict):
+    group_id: Optional[str]
+    booked: int
+    requested: int
+    results: List[BulkBookingItem]
+    saved_to: Optional[str]
+
+
+class ItineraryBooking(TypedDict):
+    status: str
+    trip: Optional[Dict[str, Any]]
+    transports: List[Dict[str, Any]]
+    errors: List[str]
+    saved_to: Optional[str]
+
+
+def _structured(payload: Dict[str, Any]) -> CallToolResult:
+    """Wrap a tool payload as structured content plus a compact JSON text block.
+    
+    FastMCP would otherwise pretty-print the text fallback; encoding it with
+    orjson keeps the text copy as small as the structured one. Returning a
+    CallToolResult from a tool needs mcp >= 1.19; older versions serialize it
+    as text (requirements.txt pins the range).
+    """
+    return CallToolResult(
+        content=[TextContent(type="text", text=orjson.dumps(payload).decode())],
+        structuredContent=payload,
+    )
+
+
+TRIP_FIELDS = ("traveler_name", "destination", "start_date", "end_date", "budget")
+TRANSPORT_FIELDS = ("transport_type", "departure", "arrival", "departure_time")
+
+
+def _new_id(prefix: str) -> str:
+    """Generate a short unique booking ID such as TRIP-1A2B3C4D."""
+    return f"{prefix}-{uuid.uuid4().hex[:8].upper()}"
+
+
+def _document_name(kind: str, booking_id: str) -> str:
+    """File name for a multi-booking document, e.g. group-1a2b3c4d.json."""
+    return f"{kind}-{booking_id.split('-', 1)[1].lower()}.json"
+
+
+def _validate_trip(trip: Dict[str, Any]) -> Optional[str]:
+    """Return an error message if the trip request is invalid, otherwise None."""
+    missing = [field for field in TRIP_FIELDS if field not in trip]
+    if missing:
+        return f"Missing fields: {', '.join(missing)}"
+    try:
+        start = datetime.strptime(trip["start_date"], "%Y-%m-%d")
+        end = datetime.strptime(trip["end_date"], "%Y-%m-%d")
+    except (TypeError, ValueError):
+        return "Dates must be in YYYY-MM-DD format"
+    if end < start:
+        return "end_date must not be before start_date"
+    if not isinstance(trip["budget"], int) or trip["budget"] < 0:
+        return "budget must be a non-negative integer"
+    return None
+
+
+def _validate_transport(leg: Dict[str, Any]) -> Optional[str]:
+    """Return an error message if the transport leg is invalid, otherwise None."""
+    missing = [field for field in TRANSPORT_FIELDS if field not in leg]
+    if missing:
+        return f"Missing fields: {', '.join(missing)}"
+    try:
+        datetime.strptime(leg["departure_time"], "%Y-%m-%d %H:%M")
+    except (TypeError, ValueError):
+        return "departure_time must be in YYYY-MM-DD HH:MM format"
+    return None
+
+
+def _trip_record(booking_id: str, trip: Dict[str, Any], booking_date: str, group_id: Optional[str] = None) -> Dict[str, Any]:
+    """Build a trip booking record from a validated trip request."""
+    record = {
+        "booking_id": booking_id,
+        "traveler_name": trip["traveler_name"],
+        "destination": trip["destination"],
+        "start_date": trip["start_date"],
+        "end_date": trip["end_date"],
+        "budget": trip["budget"],
+        "booking_date": booking_date,
+        "status": "confirmed",
+    }
+    if group_id is not None:
+        record["group_id"] = group_id
+    return record
+
+
+def _transport_record(transport_id: str, booking_id: str, leg: Dict[str, Any], booking_date: str) -> Dict[str, Any]:
+    """Build a transportation booking record from a validated transport leg."""
+    return {
+        "transport_booking_id": transport_id,
+        "trip_booking_id": booking_id,
+        "transport_type": leg["transport_type"],
+        "departure": leg["departure"],
+        "arrival": leg["arrival"],
+        "departure_time": leg["departure_time"],
+        "booking_date": booking_date,
+        "status": "confirmed",
+    }
+
 @mcp.tool()
-def recommend_trip(destination: str, budget: int, duration_days: int) -> str:
+@profiler.profile
+def recommend_trip(destination: str, budget: int, duration_days: int) -> Annotated[CallToolResult, TripRecommendation]:
     """Recommend a trip based on destination, budget, and duration.
     
     Args:
@@ -20,7 +183,8 @@ def recommend_trip(destination: str, budget: int, duration_days: int) -> str:
         duration_days: Number of days for the trip
         
     Returns:
-        A formatted string with trip recommendations
+        The budget tier and recommended activities (null activities means
+        no premade recommendation exists for the destination)
     """
     recommendations = {
         "paris": {
@@ -47,15 +211,19 @@ def recommend_trip(destination: str, budget: int, duration_days: int) -> str:
     
     dest_lower = destination.lower()
     budget_tier = "low" if budget < 1000 else "medium" if budget < 3000 else "high"
+    activities = recommendations.get(dest_lower, {}).get(budget_tier)
     
-    if dest_lower in recommendations:
-        activities = recommendations[dest_lower][budget_tier]
-        return f"Trip recommendation for {destination} ({duration_days} days, ${budget} budget):\n{activities}"
-    else:
-        return f"For {destination} with a ${budget} budget for {duration_days} days, I recommend researching local attractions, cultural sites, regional cuisine, and accommodation options that fit your budget tier ({budget_tier})."
+    return _structured({
+        "destination": destination,
+        "budget": budget,
+        "duration_days": duration_days,
+        "budget_tier": budget_tier,
+        "activities": activities,
+    })
 
 @mcp.tool()
-def book_trip(traveler_name: str, destination: str, start_date: str, end_date: str, budget: int) -> str:
+@profiler.profile
+def book_trip(traveler_name: str, destination: str, start_date: str, end_date: str, budget: int) -> Annotated[CallToolResult, TripBooking]:
     """Book a trip and save the booking details to a file.
     
     Args:
@@ -68,30 +236,23 @@ def book_trip(traveler_name: str, destination: str, start_date: str, end_date: s
     Returns:
         Booking confirmation details including booking ID
     """
-    booking_data = {
-        "booking_id": "CURRENT_TRIP",
+    trip = {
         "traveler_name": traveler_name,
         "destination": destination,
         "start_date": start_date,
         "end_date": end_date,
         "budget": budget,
-        "booking_date": datetime.now().isoformat(),
-        "status": "confirmed"
     }
-    
-    # Ensure the bookings directory exists
-    bookings_dir = os.path.join(os.path.dirname(__file__), "bookings")
-    os.makedirs(bookings_dir, exist_ok=True)
+    booking_data = _trip_record("CURRENT_TRIP", trip, datetime.now().isoformat())
     
     # Save booking to file (always overwrite the same file)
-    filename = os.path.join(bookings_dir, "current_trip.json")
-    with open(filename, 'w') as f:
-        json.dump(booking_data, f, indent=2)
+    store.commit("current_trip.json", booking_data)
     
-    return f"Trip booked successfully!\nBooking ID: {booking_data['booking_id']}\nTraveler: {traveler_name}\nDestination: {destination}\nDates: {start_date} to {end_date}\nBudget: ${budget}\nBooking saved to: current_trip.json"
+    return _structured({**booking_data, "saved_to": "current_trip.json"})
 
 @mcp.tool()
-def book_transportation(booking_id: str, transport_type: str, departure: str, arrival: str, departure_time: str) -> str:
+@profiler.profile
+def book_transportation(booking_id: str, transport_type: str, departure: str, arrival: str, departure_time: str) -> Annotated[CallToolResult, TransportBooking]:
     """Book transportation for a trip.
     
     Args:
@@ -104,28 +265,117 @@ def book_transportation(booking_id: str, transport_type: str, departure: str, ar
     Returns:
         Transportation booking confirmation details
     """
-    transport_data = {
-        "transport_booking_id": "CURRENT_TRANSPORT",
-        "trip_booking_id": booking_id,
+    leg = {
         "transport_type": transport_type,
         "departure": departure,
         "arrival": arrival,
         "departure_time": departure_time,
-        "booking_date": datetime.now().isoformat(),
-        "status": "confirmed"
     }
-    
-    # Ensure the bookings directory exists
-    bookings_dir = os.path.join(os.path.dirname(__file__), "bookings")
-    os.makedirs(bookings_dir, exist_ok=True)
+    transport_data = _transport_record("CURRENT_TRANSPORT", booking_id, leg, datetime.now().isoformat())
     
     # Save transportation booking to file (always overwrite the same file)
-    filename = os.path.join(bookings_dir, "current_transport.json")
-    with open(filename, 'w') as f:
-        json.dump(transport_data, f, indent=2)
+    store.commit("current_transport.json", transport_data)
+    
+    return _structured({**transport_data, "saved_to": "current_transport.json"})
+
+@mcp.tool()
+@profiler.profile
+def book_trips_bulk(bookings: List[Dict[str, Any]]) -> Annotated[CallToolResult, BulkBookingResult]:
+    """Book several trips at once, e.g. for a group of travelers.
+    
+    Use this instead of calling book_trip repeatedly. Each booking is validated
+    on its own; all valid bookings are saved together in a single group file.
+    
+    Args:
+        bookings: List of trips, each with traveler_name, destination,
+            start_date (YYYY-MM-DD), end_date (YYYY-MM-DD) and budget (USD)
+        
+    Returns:
+        One result per requested booking with its booking ID or error
+    """
+    group_id = _new_id("GROUP")
+    booking_date = datetime.now().isoformat()
+    
+    trips = []
+    results = []
+    for i, trip in enumerate(bookings, 1):
+        error = _validate_trip(trip)
+        if error:
+            results.append({"index": i, "status": "rejected", "booking_id": None, "error": error})
+            continue
+        record = _trip_record(_new_id("TRIP"), trip, booking_date, group_id)
+        trips.append(record)
+        results.append({"index": i, "status": "confirmed", "booking_id": record["booking_id"], "error": None})
+    
+    if not trips:
+        return _structured({"group_id": None, "booked": 0, "requested": len(bookings), "results": results, "saved_to": None})
+    
+    # Save the whole group in one write
+    filename = _document_name("group", group_id)
+    store.commit(filename, {
+        "group_id": group_id,
+        "booking_date": booking_date,
+        "trips": trips
+    })
+    
+    return _structured({"group_id": group_id, "booked": len(trips), "requested": len(bookings), "results": results, "saved_to": filename})
+
+@mcp.tool()
+@profiler.profile
+def book_itinerary(traveler_name: str, destination: str, start_date: str, end_date: str, budget: int, transport_legs: List[Dict[str, Any]]) -> Annotated[CallToolResult, ItineraryBooking]:
+    """Book a trip together with all of its transportation legs.
+    
+    The trip and legs are saved in one transaction: if any leg is invalid,
+    nothing is booked.
+    
+    Args:
+        traveler_name: Full name of the traveler
+        destination: Destination city/country
+        start_date: Trip start date in YYYY-MM-DD format
+        end_date: Trip end date in YYYY-MM-DD format
+        budget: Total budget in USD
+        transport_legs: List of legs, each with transport_type (flight, train,
+            bus, car), departure, arrival and departure_time (YYYY-MM-DD HH:MM)
+        
+    Returns:
+        The booked trip and transport records, or the validation errors
+    """
+    trip = {
+        "traveler_name": traveler_name,
+        "destination": destination,
+        "start_date": start_date,
+        "end_date": end_date,
+        "budget": budget,
+    }
+    errors = []
+    trip_error = _validate_trip(trip)
+    if trip_error:
+        errors.append(f"Trip: {trip_error}")
+    for i, leg in enumerate(transport_legs, 1):
+        leg_error = _validate_transport(leg)
+        if leg_error:
+            errors.append(f"Leg {i}: {leg_error}")
+    if errors:
+        return _structured({"status": "rejected", "trip": None, "transports": [], "errors": errors, "saved_to": None})
+    
+    booking_date = datetime.now().isoformat()
+    trip_record = _trip_record(_new_id("TRIP"), trip, booking_date)
+    transports = [
+        _transport_record(_new_id("TRANSPORT"), trip_record["booking_id"], leg, booking_date)
+        for leg in transport_legs
+    ]
+    
+    # Save the trip and all legs in one write
+    filename = _document_name("itinerary", trip_record["booking_id"])
+    store.commit(filename, {
+        "trip": trip_record,
+        "transports": transports
+    })
     
-    return f"Transportation booked successfully!\nTransport ID: {transport_data['transport_booking_id']}\nType: {transport_type}\nRoute: {departure} → {arrival}\nDeparture: {departure_time}\nLinked to trip: {booking_id}\nBooking saved to: current_transport.json"
+    return _structured({"status": "confirmed", "trip": trip_record, "transports": transports, "errors": [], "saved_to": filename})
 
 # Run the server
 if __name__ == "__main__":
-    mcp.run(transport="stdio") 
\ No newline at end of file
+    # Transport is "stdio" by default; set MCP_TRANSPORT=streamable-http (or sse)
+    # to serve over HTTP. See common/serve_http.py for multi-worker serving.
+    mcp.run(transport=os.getenv("MCP_TRANSPORT", "stdio")) 
\ No newline at end of file
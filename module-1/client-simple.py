@@ -1,37 +1,48 @@
 import asyncio
 import json
-from contextlib import AsyncExitStack
+import os
+import sys
 from typing import Any, Dict, List
 
-import nest_asyncio
 from dotenv import load_dotenv
-from mcp import ClientSession, StdioServerParameters
-from mcp.client.stdio import stdio_client
+from mcp import StdioServerParameters
 from openai import AsyncOpenAI
 
-# Apply nest_asyncio to allow nested event loops (needed for Jupyter/IPython)
-nest_asyncio.apply()
+# Make the repo-level `common` package importable when run from this folder
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.connection_pool import MCPConnectionPool
+from common.llm_cache import LLMResponseCache
+from common.tracing import TraceRecorder
 
 # Load environment variables
 load_dotenv("../.env")
 
-# Global variables to store session state
-session = None
-exit_stack = AsyncExitStack()
 openai_client = AsyncOpenAI()
 model = "gpt-4o"
-stdio = None
-write = None
 
+# Cache identical LLM requests (e.g. repeated FAQ questions); set
+# LLM_CACHE_DIR to keep the cache across runs. Turns that edit the KB are
+# never served from the cache.
+llm_cache = LLMResponseCache(
+    disk_dir=os.getenv("LLM_CACHE_DIR"),
+    mutating_tools={"add_kb_entry", "update_kb_entry", "delete_kb_entry"},
+)
 
-async def connect_to_server(server_script_path: str = "server.py"):
-    """Connect to an MCP server.
+# Set MCP_TRACE_FILE to record every tool call for replay with common/replay.py
+trace_recorder = TraceRecorder.from_env(server="kb")
+
+
+async def connect_to_server(server_script_path: str = "server.py", pool_size: int = 4) -> MCPConnectionPool:
+    """Connect to an MCP server with a pool of sessions.
 
     Args:
         server_script_path: Path to the server script.
-    """
-    global session, stdio, write, exit_stack
+        pool_size: Number of sessions to keep open to the server.
 
+    Returns:
+        A started connection pool. `process_query` can be called
+        concurrently with it from many tasks.
+    """
     # Server configuration
     server_params = StdioServerParameters(
         command="python",
@@ -39,29 +50,28 @@ async def connect_to_server(server_script_path: str = "server.py"):
     )
 
     # Connect to the server
-    stdio_transport = await exit_stack.enter_async_context(stdio_client(server_params))
-    stdio, write = stdio_transport
-    session = await exit_stack.enter_async_context(ClientSession(stdio, write))
-
-    # Initialize the connection
-    await session.initialize()
+    pool = MCPConnectionPool({"kb": server_params}, size=pool_size)
+    await pool.start()
 
     # List available tools
-    tools_result = await session.list_tools()
+    tools_result = await pool.list_tools()
     print("\nConnected to server with tools:")
     for tool in tools_result.tools:
         print(f"  - {tool.name}: {tool.description}")
 
+    return pool
+
 
-async def get_mcp_tools() -> List[Dict[str, Any]]:
+async def get_mcp_tools(pool: MCPConnectionPool) -> List[Dict[str, Any]]:
     """Get available tools from the MCP server in OpenAI format.
 
+    Args:
+        pool: Connection pool to the MCP server.
+
     Returns:
         A list of tools in OpenAI format.
     """
-    global session
-
-    tools_result = await session.list_tools()
+    tools_result = await pool.list_tools()
     return [
         {
             "type": "function",
@@ -75,22 +85,22 @@ async def get_mcp_tools() -> List[Dict[str, Any]]:
     ]
 
 
-async def process_query(query: str) -> str:
+async def process_query(pool: MCPConnectionPool, query: str) -> str:
     """Process a query using OpenAI and available MCP tools.
 
     Args:
+        pool: Connection pool to the MCP server.
         query: The user query.
 
     Returns:
         The response from OpenAI.
     """
-    global session, openai_client, model
-
     # Get available tools
-    tools = await get_mcp_tools()
+    tools = await get_mcp_tools(pool)
 
     # Initial OpenAI API call
-    response = await openai_client.chat.completions.create(
+    response = await llm_cache.acreate(
+        openai_client,
         model=model,
         messages=[{"role": "user", "content": query}],
         tools=tools,
@@ -111,10 +121,12 @@ async def process_query(query: str) -> str:
         # Process each tool call
         for tool_call in assistant_message.tool_calls:
             # Execute tool call
-            result = await session.call_tool(
-                tool_call.function.name,
-                arguments=json.loads(tool_call.function.arguments),
-            )
+            name = tool_call.function.name
+            arguments = json.loads(tool_call.function.arguments)
+            if trace_recorder is not None:
+                result = await trace_recorder.call_tool(pool, name, arguments)
+            else:
+                result = await pool.call_tool(name, arguments=arguments)
 
             # Add tool response to conversation
             messages.append(
@@ -126,7 +138,8 @@ async def process_query(query: str) -> str:
             )
 
         # Get final response from OpenAI with tool results
-        final_response = await openai_client.chat.completions.create(
+        final_response = await llm_cache.acreate(
+            openai_client,
             model=model,
             messages=messages,
             tools=tools,
@@ -139,24 +152,20 @@ async def process_query(query: str) -> str:
     return assistant_message.content
 
 
-async def cleanup():
-    """Clean up resources."""
-    global exit_stack
-    await exit_stack.aclose()
-
-
 async def main():
     """Main entry point for the client."""
-    await connect_to_server("server.py")
-
-    # Example: Ask about company vacation policy
-    query = "What is our company's vacation policy?"
-    print(f"\nQuery: {query}")
-
-    response = await process_query(query)
-    print(f"\nResponse: {response}")
-
-    await cleanup()
+    pool = await connect_to_server("server.py")
+
+    try:
+        # Example: Ask about company vacation policy
+        query = "What is our company's vacation policy?"
+        print(f"\nQuery: {query}")
+
+        response = await process_query(pool, query)
+        print(f"\nResponse: {response}")
+        print(f"\n{llm_cache.report()}")
+    finally:
+        await pool.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,341 @@
+"""Embedding index for semantic search over the knowledge base.
+
+Every KB entry ("question\\nanswer") is embedded once into a row of a
+float32 matrix with unit-length rows, so cosine similarity against a batch
+of queries is a single matrix product. The matrix is saved as a `.npy` file
+and memory-mapped, so a restarted server (or another worker) opens it
+without re-embedding anything. Each save writes the matrix to a new
+embeddings-<version>.npy and then swaps in index.json, which names that
+file, in one rename; readers therefore always see a matching matrix and
+entry list.
+
+When kb.json changes, only entries whose text is new are embedded; rows of
+unchanged entries are copied from the previous matrix. Single edits (see
+kb_store.py) are applied in memory without rewriting the matrix.
+
+Embeddings come from a local sentence-transformers model when
+KB_EMBEDDING_MODEL names one (e.g. all-MiniLM-L6-v2, run on the CPU) and
+the package is installed. Otherwise a hashing vectorizer is used: words, word
+pairs and character trigrams hashed into a fixed number of dimensions. It
+needs nothing beyond NumPy and still matches paraphrases that share word
+stems.
+"""
+
+import hashlib
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+import zlib
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import orjson
+
+# The repo-level common package; server.py puts it on sys.path
+from common.atomic_files import atomic_write
+
+# Seconds before a superseded embeddings-*.npy may be deleted
+STALE_VERSION_AGE = 60.0
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it my of on or our the to we what when where "
+    "which who why will with you your".split()
+)
+
+
+class HashingEmbedder:
+    """Embed text by hashing its features into `dim` dimensions.
+
+    Args:
+        dim: Embedding dimensions
+    """
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _features(self, text: str) -> List[str]:
+        words = [word for word in _TOKEN.findall(text.lower()) if word not in _STOPWORDS]
+        features = list(words)
+        features += [f"{a} {b}" for a, b in zip(words, words[1:])]
+        for word in words:
+            padded = f"<{word}>"
+            features += [padded[i:i + 3] for i in range(len(padded) - 2)]
+        return features
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Return a (len(texts), dim) float32 matrix with unit-length rows."""
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            hashes = np.fromiter((zlib.crc32(f.encode()) for f in self._features(text)), dtype=np.uint32)
+            if not hashes.size:
+                continue
+            # The top bit picks the sign so colliding features tend to cancel out
+            signs = np.where(hashes >> 31, -1.0, 1.0).astype(np.float32)
+            np.add.at(matrix[row], hashes % self.dim, signs)
+        return _normalize(matrix)
+
+
+class SentenceTransformerEmbedder:
+    """Embed text with a local sentence-transformers model on the CPU."""
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.name = f"st-{model_name}"
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = self.model.encode(list(texts), batch_size=64, convert_to_numpy=True, normalize_embeddings=True)
+        return vectors.astype(np.float32, copy=False)
+
+
+def default_embedder() -> Any:
+    """Use the model named by KB_EMBEDDING_MODEL if available, else the hashing vectorizer."""
+    model_name = os.getenv("KB_EMBEDDING_MODEL")
+    if model_name:
+        try:
+            return SentenceTransformerEmbedder(model_name)
+        except ImportError:
+            print("sentence-transformers is not installed; using the hashing vectorizer", file=sys.stderr)
+    return HashingEmbedder()
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def entry_text(question: str, answer: str) -> str:
+    return f"{question}\n{answer}"
+
+
+def _digest(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=12).hexdigest()
+
+
+class KBIndex:
+    """Memory-mapped embedding matrix kept in sync with the KB entries.
+
+    Rows are keyed by entry ID. `sync` rebuilds and saves the whole matrix,
+    reusing the vectors of entries whose text has not changed. `upsert` and
+    `remove` apply a single change in memory in O(1) (plus embedding one
+    text): removed rows are masked out of the saved matrix, and new or
+    edited entries live in a small in-memory overlay until the next `sync`.
+
+    Args:
+        index_dir: Directory holding index.json and the embeddings-*.npy it names
+        embedder: Object with `name` and `embed(texts) -> np.ndarray`
+    """
+
+    def __init__(self, index_dir: str, embedder: Optional[Any] = None):
+        self.index_dir = index_dir
+        self.embedder = embedder or default_embedder()
+        self.matrix: Optional[np.ndarray] = None
+        # File name of `matrix` inside index_dir
+        self.matrix_file: Optional[str] = None
+        self.ids: List[str] = []
+        self.digests: List[str] = []
+        self._row_of: Dict[str, int] = {}
+        self._alive = np.ones(0, dtype=bool)
+        # Entry ID -> (digest, vector) for entries added or edited since the last sync
+        self._overlay: Dict[str, Tuple[str, np.ndarray]] = {}
+        self._overlay_matrix: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+        self._load()
+
+    @property
+    def _meta_path(self) -> str:
+        return os.path.join(self.index_dir, "index.json")
+
+    def _load(self) -> None:
+        """Open the saved index if it was built with the same embedder."""
+        try:
+            with open(self._meta_path, "rb") as f:
+                meta = orjson.loads(f.read())
+            if meta["embedder"] != self.embedder.name:
+                return
+            matrix_file = meta["matrix"]
+            matrix = np.load(os.path.join(self.index_dir, matrix_file), mmap_mode="r")
+            ids, digests = meta["ids"], meta["digests"]
+        except (OSError, ValueError, KeyError):
+            return
+        if matrix.shape[0] == len(ids) == len(digests):
+            self._set_base(matrix, matrix_file, ids, digests)
+
+    def _set_base(self, matrix: np.ndarray, matrix_file: str, ids: List[str], digests: List[str]) -> None:
+        self.matrix = matrix
+        self.matrix_file = matrix_file
+        self.ids = ids
+        self.digests = digests
+        self._row_of = {entry_id: row for row, entry_id in enumerate(ids)}
+        self._alive = np.ones(len(ids), dtype=bool)
+        self._overlay = {}
+        self._overlay_matrix = None
+
+    def sync(self, items: Sequence[Tuple[str, str]]) -> int:
+        """Make the saved index match `items`, embedding only texts it has not seen.
+
+        Args:
+            items: (entry ID, entry text) pairs in KB order (see `entry_text`)
+
+        Returns:
+            The number of texts that had to be embedded.
+        """
+        ids = [entry_id for entry_id, _ in items]
+        digests = [_digest(text) for _, text in items]
+        with self._lock:
+            if ids == self.ids and digests == self.digests and not self._overlay and self._alive.all():
+                return 0
+
+            # Vectors we already have, by text digest
+            known: Dict[str, np.ndarray] = {}
+            for digest, vector in self._overlay.values():
+                known[digest] = vector
+            base_rows = {digest: row for row, digest in enumerate(self.digests)}
+
+            missing = [i for i, digest in enumerate(digests) if digest not in known and digest not in base_rows]
+            fresh = self.embedder.embed([items[i][1] for i in missing]) if missing else None
+
+            if self.matrix is not None and self.matrix.size:
+                dim = self.matrix.shape[1]
+            elif fresh is not None:
+                dim = fresh.shape[1]
+            elif known:
+                dim = next(iter(known.values())).shape[0]
+            else:
+                dim = 0
+            matrix = np.empty((len(items), dim), dtype=np.float32)
+
+            from_base = [(i, base_rows[digest]) for i, digest in enumerate(digests) if digest in base_rows]
+            if from_base:
+                new_rows, old_rows = zip(*from_base)
+                matrix[list(new_rows)] = self.matrix[list(old_rows)]
+            for i, digest in enumerate(digests):
+                if digest in known and digest not in base_rows:
+                    matrix[i] = known[digest]
+            if missing:
+                matrix[missing] = fresh
+
+            self._save(matrix, ids, digests)
+            return len(missing)
+
+    def _save(self, matrix: np.ndarray, ids: List[str], digests: List[str]) -> None:
+        # The matrix goes to a file no reader knows about yet; replacing
+        # index.json switches readers to it and its entry list at once
+        os.makedirs(self.index_dir, exist_ok=True)
+        matrix_file = f"embeddings-{uuid.uuid4().hex[:12]}.npy"
+        with open(os.path.join(self.index_dir, matrix_file), "xb") as f:
+            np.save(f, matrix)
+        atomic_write(self._meta_path, orjson.dumps({
+            "embedder": self.embedder.name, "matrix": matrix_file, "ids": ids, "digests": digests,
+        }))
+
+        self._set_base(np.load(os.path.join(self.index_dir, matrix_file), mmap_mode="r"), matrix_file, ids, digests)
+
+        # Drop old versions. Open memory maps survive the unlink; files saved
+        # in the last minute may belong to another process still swapping
+        # them in, or be named by an index.json someone has just read.
+        now = time.time()
+        for name in os.listdir(self.index_dir):
+            if not (name.startswith("embeddings") and name.endswith(".npy")) or name == matrix_file:
+                continue
+            path = os.path.join(self.index_dir, name)
+            try:
+                if now - os.stat(path).st_mtime > STALE_VERSION_AGE:
+                    os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def upsert(self, entry_id: str, text: str) -> bool:
+        """Add or replace one entry without touching the saved matrix.
+
+        Returns:
+            True if the text had to be embedded, False if it was unchanged.
+        """
+        digest = _digest(text)
+        with self._lock:
+            row = self._row_of.get(entry_id)
+            if entry_id not in self._overlay and row is not None and self._alive[row] and self.digests[row] == digest:
+                return False
+            if entry_id in self._overlay and self._overlay[entry_id][0] == digest:
+                return False
+        vector = self.embedder.embed([text])[0]
+        with self._lock:
+            if row is not None:
+                self._alive[row] = False
+            self._overlay[entry_id] = (digest, vector)
+            self._overlay_matrix = None
+        return True
+
+    def remove(self, entry_id: str) -> None:
+        """Drop one entry from search results."""
+        with self._lock:
+            row = self._row_of.get(entry_id)
+            if row is not None:
+                self._alive[row] = False
+            if self._overlay.pop(entry_id, None) is not None:
+                self._overlay_matrix = None
+
+    def search(self, queries: Sequence[str], top_k: int = 5) -> List[List[Tuple[str, float]]]:
+        """Find the entries most similar to each query.
+
+        Args:
+            queries: Query texts, answered in one batch
+            top_k: Results per query
+
+        Returns:
+            For each query, up to `top_k` (entry ID, cosine similarity) pairs, best first.
+
+        Raises:
+            ValueError: If `top_k` is less than 1.
+        """
+        if top_k < 1:
+            raise ValueError(f"top_k must be at least 1, got {top_k}")
+        if not queries:
+            return []
+        with self._lock:
+            matrix, ids = self.matrix, self.ids
+            dead = None if self._alive.all() else ~self._alive
+            if self._overlay and self._overlay_matrix is None:
+                self._overlay_matrix = np.stack([vector for _, vector in self._overlay.values()])
+            overlay_matrix, overlay_ids = self._overlay_matrix, list(self._overlay)
+
+        live = (len(ids) - (int(dead.sum()) if dead is not None else 0)) + len(overlay_ids)
+        if not live:
+            return [[] for _ in queries]
+        top_k = min(top_k, live)
+
+        embedded = self.embedder.embed(queries)
+        parts = []
+        if matrix is not None and len(matrix):
+            scores = embedded @ matrix.T  # (queries, entries)
+            if dead is not None:
+                scores[:, dead] = -np.inf
+            parts.append(scores)
+        if overlay_ids:
+            parts.append(embedded @ overlay_matrix.T)
+        scores = np.hstack(parts) if len(parts) > 1 else parts[0]
+        all_ids = ids + overlay_ids if overlay_ids else ids
+
+        # argpartition finds the top k in linear time; only those k are sorted
+        top = np.argpartition(-scores, top_k - 1, axis=1)[:, :top_k]
+        results = []
+        for query_scores, rows in zip(scores, top):
+            rows = rows[np.argsort(-query_scores[rows])]
+            results.append([(all_ids[row], float(query_scores[row])) for row in rows])
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": int(self._alive.sum()) + len(self._overlay),
+                "pending": len(self._overlay) + int((~self._alive).sum()),
+                "dimensions": int(self.matrix.shape[1]) if self.matrix is not None else 0,
+                "embedder": self.embedder.name,
+            }
@@ -0,0 +1,441 @@
+"""Knowledge base store with incremental updates.
+
+The KB is the snapshot in data/kb.json plus an append-only change log
+(data/kb.changes.jsonl) of the edits made since the snapshot:
+
+    {"op": "add", "id": "kb-1a2b3c4d", "question": "...", "answer": "..."}
+    {"op": "update", "id": "kb-3", "question": "...", "answer": "..."}
+    {"op": "delete", "id": "kb-7"}
+
+An edit appends one line and updates the in-memory entries and the search
+index for that one entry, so its cost does not grow with the size of the KB.
+A background thread compacts the log once it has `compact_after` changes
+(or on the next `compact_interval` tick): it writes a new kb.json with the
+changes applied, keeps any lines appended meanwhile in a fresh log, and
+then saves the search index in full. Writing the snapshot and saving the
+index do not block edits.
+
+Entries are the items of kb.json as loaded, so compaction writes back any
+extra fields an item has; an update only replaces its question and answer.
+Dict items are identified by their "id" field. Items without one get
+"kb-<position>" when first loaded, and compaction writes those IDs back, so
+IDs stay stable from then on. Items that are not dicts are shown as
+"Item <position>" with the ID "item-<position>" and are written back
+unchanged (updating one turns it into a Q&A dict). A kb.json that is not a
+list is shown as-is by get_knowledge_base but cannot be searched or edited.
+
+The search index (and NumPy with it) is only loaded on the first search, so
+a server that just lists or edits entries starts as fast as before. Until
+then edits only touch the entries; the first search syncs the index, which
+reuses the saved vectors of unchanged entries.
+
+Several processes (e.g. serve_http workers) can share one KB. Appends and
+the compaction swap hold an exclusive `flock` on kb.json.lock, and every
+read first replays the log lines other processes appended since the last
+one it saw. A compacted log starts with a header naming the snapshot and
+log it was compacted from, so the other processes switch to the new files
+without reloading anything: their entries are already up to date. A
+compaction that finds the files already swapped by another process is
+dropped. If kb.json is replaced from outside, the next read reloads it and
+applies the pending log on top, and the next search re-syncs the index.
+"""
+
+import fcntl
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import orjson
+
+# The repo-level common package; server.py puts it on sys.path
+from common.atomic_files import write_temp
+
+
+def question_answer(entry_id: str, item: Any) -> Tuple[str, str]:
+    """Return the question and answer shown for a KB item."""
+    if isinstance(item, dict):
+        return item.get("question", "Unknown question"), item.get("answer", "Unknown answer")
+    return f"Item {entry_id.rpartition('-')[2]}", str(item)
+
+
+def _with_id(entry_id: str, item: Any) -> Any:
+    """The item as compaction writes it: dicts get their ID, anything else is unchanged."""
+    if not isinstance(item, dict) or item.get("id"):
+        return item
+    if "id" in item:
+        return dict(item, id=entry_id)
+    return {"id": entry_id, **item}
+
+
+class KBStore:
+    """KB entries kept in memory, persisted as a snapshot plus a change log.
+
+    Args:
+        kb_path: Path of the kb.json snapshot
+        index_dir: Directory of the search index (default: .kb_index next to kb.json)
+        log_path: Path of the change log (default: next to kb.json)
+        compact_after: Log length that triggers a compaction
+        compact_interval: Seconds between checks for a non-empty log to compact
+    """
+
+    def __init__(self, kb_path: str, index_dir: Optional[str] = None, log_path: Optional[str] = None,
+                 compact_after: int = 1000, compact_interval: float = 60.0):
+        self.kb_path = kb_path
+        self.log_path = log_path or os.path.join(os.path.dirname(kb_path), "kb.changes.jsonl")
+        self.lock_path = f"{kb_path}.lock"
+        self.index_dir = index_dir or os.path.join(os.path.dirname(kb_path), ".kb_index")
+        # KBIndex, created by the first search
+        self.index: Optional[Any] = None
+        self.compact_after = compact_after
+        self.compact_interval = compact_interval
+        # Entry ID -> kb.json item
+        self.entries: Dict[str, Any] = {}
+        # kb.json's content when it is not a list
+        self.document: Optional[Any] = None
+        self.log_length = 0
+        self._loaded = False
+        self._stamp: Optional[Tuple[int, int]] = None
+        # Inode of the log file and how far into it this process has read
+        self._log_inode: Optional[int] = None
+        self._log_offset = 0
+        # Set when the entries were reloaded; the next search syncs the index
+        self._index_stale = False
+        self._lock = threading.RLock()
+        self._compact_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._compactor: Optional[threading.Thread] = None
+
+    def _snapshot_stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.kb_path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _log_stat(self) -> Tuple[Optional[int], int]:
+        try:
+            stat = os.stat(self.log_path)
+        except FileNotFoundError:
+            return None, 0
+        return stat.st_ino, stat.st_size
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """Hold the in-process lock and the cross-process lock on kb.json.lock."""
+        with self._lock:
+            with open(self.lock_path, "ab") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def refresh(self) -> None:
+        """Catch up with kb.json and the change log on disk.
+
+        Lines appended to the log (by this or another process) are replayed
+        incrementally, and so is a log another process compacted; a kb.json
+        replaced from outside is reloaded in full.
+
+        Raises:
+            FileNotFoundError: If neither kb.json nor a change log exists.
+            ValueError: If kb.json is not valid JSON.
+        """
+        stamp = self._snapshot_stamp()
+        log_inode, log_size = self._log_stat()
+        with self._lock:
+            if self._loaded and stamp == self._stamp and log_inode == self._log_inode:
+                if log_size > self._log_offset:
+                    self._replay_tail()
+                return
+            if self._loaded and log_inode != self._log_inode and self._adopt_compaction(stamp):
+                self._replay_tail()
+                return
+            if stamp is None and log_inode is None:
+                raise FileNotFoundError(self.kb_path)
+
+            entries: Dict[str, Any] = {}
+            document = None
+            if stamp is not None:
+                with open(self.kb_path, "rb") as f:
+                    kb_data = orjson.loads(f.read())
+                if isinstance(kb_data, list):
+                    for i, item in enumerate(kb_data, 1):
+                        if isinstance(item, dict):
+                            entries[str(item.get("id") or f"kb-{i}")] = item
+                        else:
+                            entries[f"item-{i}"] = item
+                else:
+                    document = kb_data
+
+            self.log_length = 0
+            self._log_inode, self._log_offset = None, 0
+            try:
+                with open(self.log_path, "rb") as f:
+                    self._log_inode = os.fstat(f.fileno()).st_ino
+                    for change in self._read_changes(f):
+                        self._apply(entries, change)
+            except FileNotFoundError:
+                pass
+
+            self.entries = entries
+            self.document = document
+            self._stamp = stamp
+            self._loaded = True
+            # Not synced here: writers call this under the file lock
+            self._index_stale = True
+
+    def _adopt_compaction(self, stamp: Optional[Tuple[int, int]]) -> bool:
+        """Switch to a snapshot and log compacted from the ones this process has read.
+
+        The new snapshot holds the changes up to the header's `folded` offset
+        of the old log, which this process has already applied, so only the
+        new log is replayed. Its first lines were copied from the old log and
+        are applied a second time, which is harmless: every change sets or
+        deletes a whole entry.
+
+        Returns:
+            False if the files were not compacted from what this process has
+            read, e.g. because kb.json was replaced from outside.
+        """
+        try:
+            with open(self.log_path, "rb") as f:
+                header_line = f.readline()
+                log_inode = os.fstat(f.fileno()).st_ino
+            header = orjson.loads(header_line)
+        except (FileNotFoundError, orjson.JSONDecodeError):
+            return False
+        if not header_line.endswith(b"\n") or not isinstance(header, dict) or header.get("op") != "compacted":
+            return False
+        if (header.get("snapshot") != (list(stamp) if stamp else None)
+                or header.get("from_snapshot") != (list(self._stamp) if self._stamp else None)
+                or header.get("from_log") != self._log_inode
+                or not isinstance(header.get("folded"), int)
+                or header["folded"] > self._log_offset):
+            return False
+
+        self._stamp = stamp
+        self._log_inode, self._log_offset = log_inode, len(header_line)
+        self.log_length = 0
+        return True
+
+    def _read_changes(self, f: Any) -> Iterator[dict]:
+        """Yield the complete log lines from the current position, advancing the offset."""
+        for line in f:
+            if not line.endswith(b"\n"):
+                # Another process is still writing this line; read it next time
+                break
+            self._log_offset += len(line)
+            if line.strip():
+                change = orjson.loads(line)
+                if change["op"] == "compacted":
+                    continue
+                self.log_length += 1
+                yield change
+
+    def _replay_tail(self) -> None:
+        """Apply log lines appended since this process last read the log."""
+        with open(self.log_path, "rb") as f:
+            f.seek(self._log_offset)
+            for change in self._read_changes(f):
+                self._apply(self.entries, change)
+                self._index_change(change)
+
+    def _index_items(self) -> List[Tuple[str, str]]:
+        from kb_index import entry_text
+
+        return [(entry_id, entry_text(*question_answer(entry_id, item))) for entry_id, item in self.entries.items()]
+
+    def _search_index(self) -> Any:
+        """Return the search index, syncing it with the entries if they were reloaded."""
+        with self._lock:
+            if self.index is None:
+                from kb_index import KBIndex
+
+                self.index = KBIndex(self.index_dir)
+                self._index_stale = True
+            if self._index_stale:
+                self.index.sync(self._index_items())
+                self._index_stale = False
+            return self.index
+
+    def _index_change(self, change: dict) -> None:
+        if self.index is None or self._index_stale:
+            return
+        if change["op"] == "delete":
+            self.index.remove(change["id"])
+        else:
+            from kb_index import entry_text
+
+            self.index.upsert(change["id"], entry_text(change["question"], change["answer"]))
+
+    @staticmethod
+    def _apply(entries: Dict[str, Any], change: dict) -> None:
+        entry_id = change["id"]
+        if change["op"] == "delete":
+            entries.pop(entry_id, None)
+            return
+        current = entries.get(entry_id)
+        # A new dict rather than an in-place edit: compaction serializes items outside the lock
+        item = dict(current) if change["op"] == "update" and isinstance(current, dict) else {}
+        item["question"] = change["question"]
+        item["answer"] = change["answer"]
+        entries[entry_id] = item
+
+    def _check_list(self) -> None:
+        if self.document is not None:
+            raise ValueError("kb.json is not a list of Q&A pairs, so it can't be searched or edited")
+
+    def all(self) -> List[Tuple[str, Any]]:
+        """Return (ID, item) pairs in KB order."""
+        self.refresh()
+        with self._lock:
+            return list(self.entries.items())
+
+    def search(self, queries: List[str], top_k: int) -> List[List[Tuple[str, Any, float]]]:
+        """Semantic search; returns (ID, item, score) triples per query.
+
+        Raises:
+            ValueError: If kb.json is not a list.
+        """
+        self.refresh()
+        self._check_list()
+        results = self._search_index().search(queries, top_k)
+        with self._lock:
+            return [
+                [(entry_id, self.entries[entry_id], score) for entry_id, score in matches if entry_id in self.entries]
+                for matches in results
+            ]
+
+    def add(self, question: str, answer: str) -> str:
+        """Add an entry and return its ID."""
+        entry_id = f"kb-{uuid.uuid4().hex[:8]}"
+        self._write(lambda entries: {"op": "add", "id": entry_id, "question": question, "answer": answer})
+        return entry_id
+
+    def update(self, entry_id: str, question: Optional[str] = None, answer: Optional[str] = None) -> Any:
+        """Change an entry's question and/or answer, keeping its other fields.
+
+        Returns:
+            The updated item.
+
+        Raises:
+            KeyError: If there is no entry with this ID.
+        """
+        def change(entries: Dict[str, Any]) -> dict:
+            current_question, current_answer = question_answer(entry_id, entries[entry_id])
+            return {
+                "op": "update",
+                "id": entry_id,
+                "question": current_question if question is None else question,
+                "answer": current_answer if answer is None else answer,
+            }
+
+        self._write(change)
+        with self._lock:
+            return self.entries[entry_id]
+
+    def delete(self, entry_id: str) -> None:
+        """Delete an entry.
+
+        Raises:
+            KeyError: If there is no entry with this ID.
+        """
+        def change(entries: Dict[str, Any]) -> dict:
+            if entry_id not in entries:
+                raise KeyError(entry_id)
+            return {"op": "delete", "id": entry_id}
+
+        self._write(change)
+
+    def _write(self, make_change: Callable[[Dict[str, Any]], dict]) -> None:
+        """Append a change to the log and apply it to the entries and index.
+
+        `make_change` builds the change from the current entries. It runs
+        under the file lock after catching up with other processes' edits,
+        so it checks the entry against the latest state.
+
+        Raises:
+            ValueError: If kb.json is not a list.
+        """
+        with self._file_lock():
+            try:
+                self.refresh()
+            except FileNotFoundError:
+                # Starting a KB from scratch: the log is the whole KB
+                self._loaded = True
+                self._stamp = None
+                self.document = None
+            self._check_list()
+            change = make_change(self.entries)
+            with open(self.log_path, "ab") as f:
+                f.write(orjson.dumps(change) + b"\n")
+                self._log_inode = os.fstat(f.fileno()).st_ino
+                self._log_offset = f.tell()
+            self._apply(self.entries, change)
+            self.log_length += 1
+            self._index_change(change)
+
+        self._start_compactor()
+        if self.log_length >= self.compact_after:
+            self._wake.set()
+
+    def _start_compactor(self) -> None:
+        if self._compactor is None or not self._compactor.is_alive():
+            self._compactor = threading.Thread(target=self._compact_loop, name="kb-compactor", daemon=True)
+            self._compactor.start()
+
+    def _compact_loop(self) -> None:
+        while True:
+            self._wake.wait(self.compact_interval)
+            self._wake.clear()
+            if self.log_length:
+                self.compact()
+
+    def compact(self) -> None:
+        """Fold the change log into kb.json, then save the search index in full."""
+        with self._compact_lock:
+            with self._file_lock():
+                self.refresh()
+                if self._log_inode is None or self.document is not None:
+                    return
+                items = list(self.entries.items())
+                stamp, log_inode, folded = self._stamp, self._log_inode, self._log_offset
+
+            # The expensive part runs without blocking edits
+            snapshot = orjson.dumps([_with_id(entry_id, item) for entry_id, item in items])
+            tmp_kb = write_temp(self.kb_path, snapshot, suffix=".json")
+            tmp_stat = os.stat(tmp_kb)
+
+            with self._file_lock():
+                if self._snapshot_stamp() != stamp or self._log_stat()[0] != log_inode:
+                    # Another process compacted meanwhile; its snapshot wins
+                    os.remove(tmp_kb)
+                    return
+                # Keep the changes appended while the snapshot was written
+                self.refresh()
+                with open(self.log_path, "rb") as f:
+                    f.seek(folded)
+                    tail = f.read(self._log_offset - folded)
+                # Lets the other processes adopt the new files (see _adopt_compaction)
+                header = orjson.dumps({
+                    "op": "compacted",
+                    "snapshot": [tmp_stat.st_mtime_ns, tmp_stat.st_size],
+                    "from_snapshot": list(stamp) if stamp else None,
+                    "from_log": log_inode,
+                    "folded": folded,
+                })
+                tmp_log = write_temp(self.log_path, header + b"\n" + tail, suffix=".jsonl")
+                os.replace(tmp_kb, self.kb_path)
+                os.replace(tmp_log, self.log_path)
+                self._stamp = self._snapshot_stamp()
+                self._log_inode, self._log_offset = self._log_stat()
+                self.log_length = tail.count(b"\n")
+
+            # Other processes can edit while the index is saved
+            with self._lock:
+                if self.index is not None:
+                    self.index.sync(self._index_items())
+                    self._index_stale = False
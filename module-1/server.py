@@ -1,16 +1,58 @@
 import os
+import sys
 import json
+from typing import Any, Dict, List, Optional
+
 from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp.exceptions import ToolError
+
+# Make the repo-level `common` package importable when run from this folder
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.profiling import ToolProfiler
+
+from kb_store import KBStore, question_answer
 
 # Create an MCP server
 mcp = FastMCP(
     name="Knowledge Base",
-    host="0.0.0.0",  # only used for SSE transport (localhost)
-    port=8050,  # only used for SSE transport (set this to any port)
+    host="0.0.0.0",  # only used for SSE/HTTP transports (localhost)
+    port=8050,  # only used for SSE/HTTP transports (set this to any port)
+    stateless_http=True,  # no per-client session state, so any worker can serve any request
 )
 
+# Off unless MCP_PROFILE_RATE is set; see common/profiling.py
+profiler = ToolProfiler.for_server(mcp)
+
+
+KB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "kb.json")
+
+# kb.json plus the log of edits made through the tools below. The embedding
+# index (data/.kb_index) is only loaded by the first search, so startup and
+# get_knowledge_base don't pay for NumPy.
+kb_store = KBStore(KB_PATH)
+
+
+def _search(queries: List[str], top_k: int) -> List[List[Dict[str, Any]]]:
+    if top_k < 1:
+        raise ToolError(f"top_k must be at least 1, got {top_k}")
+    try:
+        results = kb_store.search(queries, top_k)
+    except FileNotFoundError:
+        raise ToolError("Knowledge base file not found")
+    except ValueError as e:
+        raise ToolError(f"Invalid knowledge base file: {e}")
+    found = []
+    for matches in results:
+        hits = []
+        for entry_id, item, score in matches:
+            question, answer = question_answer(entry_id, item)
+            hits.append({"id": entry_id, "question": question, "answer": answer, "score": round(score, 4)})
+        found.append(hits)
+    return found
+
 
 @mcp.tool()
+@profiler.profile
 def get_knowledge_base() -> str:
     """Retrieve the entire knowledge base as a formatted string.
 
@@ -18,26 +60,17 @@ def get_knowledge_base() -> str:
         A formatted string containing all Q&A pairs from the knowledge base.
     """
     try:
-        kb_path = os.path.join(os.path.dirname(__file__), "data", "kb.json")
-        with open(kb_path, "r") as f:
-            kb_data = json.load(f)
-
         # Format the knowledge base as a string
         kb_text = "Here is the retrieved knowledge base:\n\n"
 
-        if isinstance(kb_data, list):
-            for i, item in enumerate(kb_data, 1):
-                if isinstance(item, dict):
-                    question = item.get("question", "Unknown question")
-                    answer = item.get("answer", "Unknown answer")
-                else:
-                    question = f"Item {i}"
-                    answer = str(item)
+        entries = kb_store.all()
+        if kb_store.document is not None:
+            kb_text += f"Knowledge base content: {json.dumps(kb_store.document, indent=2)}\n\n"
 
-                kb_text += f"Q{i}: {question}\n"
-                kb_text += f"A{i}: {answer}\n\n"
-        else:
-            kb_text += f"Knowledge base content: {json.dumps(kb_data, indent=2)}\n\n"
+        for i, (entry_id, item) in enumerate(entries, 1):
+            question, answer = question_answer(entry_id, item)
+            kb_text += f"Q{i} [{entry_id}]: {question}\n"
+            kb_text += f"A{i}: {answer}\n\n"
 
         return kb_text
     except FileNotFoundError:
@@ -48,6 +81,117 @@ def get_knowledge_base() -> str:
         return f"Error: {str(e)}"
 
 
+@mcp.tool()
+@profiler.profile
+def semantic_search_kb(query: str, top_k: int = 5) -> Dict[str, Any]:
+    """Find the knowledge base Q&A pairs closest in meaning to a question.
+
+    Use this instead of get_knowledge_base when only the relevant entries are needed.
+
+    Args:
+        query: The question to look up, in any wording
+        top_k: Number of Q&A pairs to return
+
+    Returns:
+        {"matches": [...]}: the best matching Q&A pairs with their ID and
+        similarity score (higher is closer).
+    """
+    # One object rather than a list, so the hits arrive as a single content block
+    return {"matches": _search([query], top_k)[0]}
+
+
+@mcp.tool()
+@profiler.profile
+def semantic_search_kb_batch(queries: List[str], top_k: int = 5) -> Dict[str, Any]:
+    """Look up several questions in the knowledge base at once.
+
+    Args:
+        queries: The questions to look up
+        top_k: Number of Q&A pairs to return per question
+
+    Returns:
+        {"results": [{"query": ..., "matches": [...]}, ...]}: for each question,
+        its best matching Q&A pairs with IDs and similarity scores.
+    """
+    return {
+        "results": [
+            {"query": query, "matches": matches} for query, matches in zip(queries, _search(queries, top_k))
+        ]
+    }
+
+
+@mcp.tool()
+@profiler.profile
+def add_kb_entry(question: str, answer: str) -> Dict[str, str]:
+    """Add a Q&A pair to the knowledge base.
+
+    Args:
+        question: The question
+        answer: Its answer
+
+    Returns:
+        The new entry with its ID.
+    """
+    if not question.strip() or not answer.strip():
+        raise ToolError("Question and answer must not be empty")
+    try:
+        entry_id = kb_store.add(question, answer)
+    except ValueError as e:
+        raise ToolError(f"Invalid knowledge base file: {e}")
+    return {"id": entry_id, "question": question, "answer": answer}
+
+
+@mcp.tool()
+@profiler.profile
+def update_kb_entry(entry_id: str, question: Optional[str] = None, answer: Optional[str] = None) -> Dict[str, str]:
+    """Change the question and/or answer of a knowledge base entry.
+
+    Args:
+        entry_id: ID of the entry (as shown by get_knowledge_base or the search tools)
+        question: New question, or omit to keep the current one
+        answer: New answer, or omit to keep the current one
+
+    Returns:
+        The updated entry.
+    """
+    if question is None and answer is None:
+        raise ToolError("Nothing to update: give a question and/or an answer")
+    try:
+        item = kb_store.update(entry_id, question, answer)
+    except KeyError:
+        raise ToolError(f"No knowledge base entry with ID {entry_id}")
+    except FileNotFoundError:
+        raise ToolError("Knowledge base file not found")
+    except ValueError as e:
+        raise ToolError(f"Invalid knowledge base file: {e}")
+    question, answer = question_answer(entry_id, item)
+    return {"id": entry_id, "question": question, "answer": answer}
+
+
+@mcp.tool()
+@profiler.profile
+def delete_kb_entry(entry_id: str) -> str:
+    """Delete a knowledge base entry.
+
+    Args:
+        entry_id: ID of the entry to delete
+
+    Returns:
+        Confirmation message.
+    """
+    try:
+        kb_store.delete(entry_id)
+    except KeyError:
+        raise ToolError(f"No knowledge base entry with ID {entry_id}")
+    except FileNotFoundError:
+        raise ToolError("Knowledge base file not found")
+    except ValueError as e:
+        raise ToolError(f"Invalid knowledge base file: {e}")
+    return f"Deleted knowledge base entry {entry_id}"
+
+
 # Run the server
 if __name__ == "__main__":
-    mcp.run(transport="stdio")
+    # Transport is "stdio" by default; set MCP_TRANSPORT=streamable-http (or sse)
+    # to serve over HTTP. See common/serve_http.py for multi-worker serving.
+    mcp.run(transport=os.getenv("MCP_TRANSPORT", "stdio"))